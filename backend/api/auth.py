@@ -3,16 +3,19 @@ import os
 import uuid
 from pathlib import Path
 
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
+from fastapi import APIRouter, Depends, File, HTTPException, Request, UploadFile, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.auth.jwt import create_access_token
-from backend.auth.password import hash_password, verify_password
+from backend.auth.password import HashingOverloaded, hash_password_async, needs_rehash, verify_password_async
+from backend.config import settings
 from backend.database import get_db
 from backend.deps import get_current_user
 from backend.models.user import User
 from backend.schemas.user import LoginRequest, Token, UserCreate, UserResponse, UserUpdate
+from backend.services import rate_limit
+from backend.services.user_cache import user_cache
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
@@ -21,15 +24,40 @@ ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp"}
 MAX_AVATAR_BYTES = 5 * 1024 * 1024  # 5 MB
 
 
+def _client_ip(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+
+async def _rate_limit(key: str, limit: int, window_s: int) -> None:
+    retry_after = await rate_limit.hit(key, limit, window_s)
+    if retry_after is not None:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many attempts, try again later",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
+def _overloaded(e: HashingOverloaded) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e), headers={"Retry-After": "1"}
+    )
+
+
 @router.post("/register", response_model=UserResponse)
-async def register(body: UserCreate, db: AsyncSession = Depends(get_db)):
-    """Create a new user. Returns user (no password)."""
+async def register(body: UserCreate, request: Request, db: AsyncSession = Depends(get_db)):
+    """Create a new user. Returns user (no password). Rate-limited per client IP."""
+    await _rate_limit(f"register:ip:{_client_ip(request)}", settings.REGISTER_RATE_PER_IP, settings.AUTH_RATE_WINDOW_SECONDS)
     result = await db.execute(select(User).where(User.email == body.email))
     if result.scalar_one_or_none():
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
+    try:
+        hashed = await hash_password_async(body.password)
+    except HashingOverloaded as e:
+        raise _overloaded(e)
     user = User(
         email=body.email,
-        hashed_password=hash_password(body.password),
+        hashed_password=hashed,
         name=(body.name or "").strip() or None,
     )
     db.add(user)
@@ -39,11 +67,24 @@ async def register(body: UserCreate, db: AsyncSession = Depends(get_db)):
 
 
 @router.post("/login", response_model=Token)
-async def login(body: LoginRequest, db: AsyncSession = Depends(get_db)):
-    """Login with email + password; returns JWT access_token."""
+async def login(body: LoginRequest, request: Request, db: AsyncSession = Depends(get_db)):
+    """
+    Login with email + password; returns JWT access_token. Rate-limited per client IP and per account. A hash
+    made with an old BCRYPT_ROUNDS is replaced on successful login.
+    """
+    await _rate_limit(f"login:ip:{_client_ip(request)}", settings.LOGIN_RATE_PER_IP, settings.AUTH_RATE_WINDOW_SECONDS)
+    await _rate_limit(f"login:account:{body.email.lower()}", settings.LOGIN_RATE_PER_ACCOUNT, settings.AUTH_RATE_WINDOW_SECONDS)
     result = await db.execute(select(User).where(User.email == body.email))
     user = result.scalar_one_or_none()
-    if not user or not verify_password(body.password, user.hashed_password):
+    try:
+        valid = user is not None and await verify_password_async(body.password, user.hashed_password)
+        if valid and needs_rehash(user.hashed_password):
+            user.hashed_password = await hash_password_async(body.password)
+            await db.flush()
+            await user_cache.invalidate(user.id)
+    except HashingOverloaded as e:
+        raise _overloaded(e)
+    if not valid:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid email or password")
     token = create_access_token(data={"sub": str(user.id)}) #
     return Token(access_token=token)
@@ -68,6 +109,7 @@ async def update_me(
         current_user.has_vehicle = body.has_vehicle
     await db.flush()
     await db.refresh(current_user)
+    await user_cache.invalidate(current_user.id)
     return current_user
 
 
@@ -103,4 +145,5 @@ async def upload_avatar(
     current_user.avatar_url = f"/avatars/{filename}"
     await db.flush()
     await db.refresh(current_user)
+    await user_cache.invalidate(current_user.id)
     return current_user
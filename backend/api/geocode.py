@@ -0,0 +1,35 @@
+"""Geocoding proxy: campus gazetteer first, cached upstream geocoder second. Public, no auth."""
+import httpx
+from fastapi import APIRouter, HTTPException, Query
+
+from backend.schemas.geocode import GeocodePlace
+from backend.services import geocoder
+
+router = APIRouter(prefix="/geocode", tags=["geocode"])
+
+
+@router.get("", response_model=list[GeocodePlace])
+async def geocode_search(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(default=10, ge=1, le=50),
+):
+    """Places whose name has a word starting with q (stops, buildings); upstream geocoder if none match."""
+    try:
+        return await geocoder.search(q, limit)
+    except httpx.HTTPError:
+        raise HTTPException(status_code=502, detail="Geocoder unavailable")
+
+
+@router.get("/reverse", response_model=GeocodePlace)
+async def geocode_reverse(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+):
+    """Name for a point: nearby campus place if any, else the upstream geocoder's address."""
+    try:
+        place = await geocoder.reverse(lat, lng)
+    except httpx.HTTPError:
+        raise HTTPException(status_code=502, detail="Geocoder unavailable")
+    if place is None:
+        raise HTTPException(status_code=404, detail="No place found")
+    return place
@@ -2,27 +2,44 @@
 
 from fastapi import APIRouter, HTTPException
 
+from backend.config import settings
 from backend.schemas.guidance import WalkFromStopRequest, WalkGuidanceResponse, WalkStep
-from backend.services.osrm import get_walking_route_steps
+from backend.services import metrics
+from backend.services.osrm import OsrmUnavailable, call_with_budget, get_walking_route_steps, straight_line_route
 from backend.services.stops_loader import load_fsu_stops
 
 router = APIRouter(prefix="/guidance", tags=["guidance"])
 
+metrics.register_gauge("guidance.walk_fallback_rate", lambda: metrics.ratio("guidance.walk_fallbacks", "guidance.walk_requests"))
+
 
 @router.post("/walk-from-stop", response_model=WalkGuidanceResponse)
 async def walk_from_stop(body: WalkFromStopRequest):
+    """Walking route from a stop via OSRM; straight-line estimate (approximate=true) if OSRM is slow or down."""
     stops = load_fsu_stops()
     stop = next((s for s in stops if str(s.get("id")) == body.stop_id), None)
     if not stop:
         raise HTTPException(status_code=404, detail="Stop not found")
     origin_lat = float(stop["lat"])
     origin_lng = float(stop["lng"])
-    distance_m, duration_s, steps_raw = await get_walking_route_steps(
-        origin_lat=origin_lat,
-        origin_lng=origin_lng,
-        dest_lat=body.dest_lat,
-        dest_lng=body.dest_lng,
-    )
+    metrics.incr("guidance.walk_requests")
+    approximate = False
+    try:
+        distance_m, duration_s, steps_raw = await call_with_budget(
+            get_walking_route_steps(
+                origin_lat=origin_lat,
+                origin_lng=origin_lng,
+                dest_lat=body.dest_lat,
+                dest_lng=body.dest_lng,
+                base_url=settings.OSRM_BASE_URL,
+                timeout_s=settings.OSRM_LATENCY_BUDGET_SECONDS,
+            ),
+            budget_s=settings.OSRM_LATENCY_BUDGET_SECONDS,
+        )
+    except OsrmUnavailable:
+        metrics.incr("guidance.walk_fallbacks")
+        approximate = True
+        distance_m, duration_s, steps_raw = straight_line_route(origin_lat, origin_lng, body.dest_lat, body.dest_lng)
     steps = [WalkStep(**s) for s in steps_raw]
     return WalkGuidanceResponse(
         origin_stop_id=body.stop_id,
@@ -30,5 +47,5 @@ async def walk_from_stop(body: WalkFromStopRequest):
         distance_m=distance_m,
         duration_s=duration_s,
         steps=steps,
+        approximate=approximate,
     )
-
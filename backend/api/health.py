@@ -1,8 +1,16 @@
 from fastapi import APIRouter
 
+from backend.services import metrics
+
 router = APIRouter(tags=["health"])
 
 
 @router.get("/health")
 def health():
     return {"status": "ok"}
+
+
+@router.get("/metrics")
+def get_metrics():
+    """Process-local counters and gauges (breaker state, fallback and cache hit rates, queue depths)."""
+    return metrics.snapshot()
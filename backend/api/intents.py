@@ -1,38 +1,32 @@
 """Intent routes: create and list (auth required)."""
 from datetime import datetime, timedelta, timezone
+from typing import Literal
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from pydantic import TypeAdapter
+from sqlalchemy import delete, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.sql import func
 
 from backend.database import get_db
 from backend.deps import get_current_user
 from backend.models.intent import Intent
+from backend.models.rating import Rating
 from backend.models.session import Session, SessionState
+from backend.models.session_member import SessionMember
 from backend.models.user import User
+from backend.redis_client import get_redis
 from backend.schemas.intent import BusStopNearbyResponse, IntentCreate, IntentResponse, MatchCardResponse
+from backend.services import response_cache
+from backend.services.location_store import clear_sessions
 from backend.services.matcher import ROUTE_WEIGHT, RATING_WEIGHT, find_matches
 from backend.services.stops_loader import get_fsu_stop_coords
-from backend.services.ws_updates import updates_manager
+from backend.services.ws_updates import intent_delete, intent_upsert, session_delete, updates_manager
 
 router = APIRouter(prefix="/intents", tags=["intents"])
 
+_INTENT_LIST = TypeAdapter(list[IntentResponse])
 
-def _point_wkt(lng: float, lat: float) -> str:
-    """Build EWKT for a point (PostGIS SRID 4326 = WGS84)."""
-    return f"SRID=4326;POINT({lng} {lat})"
-#here _point_wkt is a helper function to build the EWKT for a point (PostGIS SRID 4326 = WGS84).
-#here EWKT is a Well-Known Text representation of a geometry.
-#here SRID is the Spatial Reference System Identifier.
-#here WGS84 is the World Geodetic System 1984, a coordinate system for the Earth's surface.
-#here POINT is the type of geometry.
-#here SRID=4326;POINT({lng} {lat}) is the EWKT for a point.
-#here lng is the longitude.
-#here lat is the latitude.
-#here {lng} {lat} is the coordinates of the point.
-#here SRID=4326;POINT({lng} {lat}) is the EWKT for a point.
-#here SRID=4326;POINT({lng} {lat}) is the EWKT for a point.
 
 @router.post("", response_model=IntentResponse)
 async def create_intent(
@@ -53,8 +47,10 @@ async def create_intent(
     expires_at = now + timedelta(minutes=body.expires_in_minutes)
     intent = Intent(
         user_id=current_user.id,
-        origin=_point_wkt(body.origin_lng, body.origin_lat),
-        destination=_point_wkt(body.dest_lng, body.dest_lat),
+        origin_lat=body.origin_lat,
+        origin_lng=body.origin_lng,
+        dest_lat=body.dest_lat,
+        dest_lng=body.dest_lng,
         start_time=body.start_time,
         end_time=body.end_time,
         expires_at=expires_at,
@@ -62,8 +58,9 @@ async def create_intent(
     db.add(intent)
     await db.flush()
     await db.refresh(intent)
-    await updates_manager.notify_user(current_user.id, {"type": "intents"})
-    return IntentResponse(
+    # Commit before pushing, so clients (and the list cache the push invalidates) see the new row
+    await db.commit()
+    response = IntentResponse(
         id=intent.id,
         user_id=intent.user_id,
         origin_lat=body.origin_lat,
@@ -75,6 +72,8 @@ async def create_intent(
         expires_at=intent.expires_at,
         created_at=intent.created_at,
     )
+    await updates_manager.notify_user(current_user.id, intent_upsert(response))
+    return response
 
 
 @router.get("", response_model=list[IntentResponse])
@@ -82,42 +81,49 @@ async def list_my_intents(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    """List current user's intents (not expired)."""
-    now = datetime.now(timezone.utc)
-    q = (
-        select(
-            Intent.id,
-            Intent.user_id,
-            func.ST_Y(Intent.origin).label("origin_lat"),
-            func.ST_X(Intent.origin).label("origin_lng"),
-            func.ST_Y(Intent.destination).label("dest_lat"),
-            func.ST_X(Intent.destination).label("dest_lng"),
-            Intent.start_time,
-            Intent.end_time,
-            Intent.expires_at,
-            Intent.created_at,
-        )
-        .where(Intent.user_id == current_user.id)
-        .where(Intent.expires_at > now)
-        .order_by(Intent.created_at.desc())
-    )
-    result = await db.execute(q)
-    rows = result.all()
-    return [
-        IntentResponse(
-            id=r.id,
-            user_id=r.user_id,
-            origin_lat=float(r.origin_lat),
-            origin_lng=float(r.origin_lng),
-            dest_lat=float(r.dest_lat),
-            dest_lng=float(r.dest_lng),
-            start_time=r.start_time,
-            end_time=r.end_time,
-            expires_at=r.expires_at,
-            created_at=r.created_at,
+    """List current user's intents (not expired), cached per user until the first of them expires."""
+
+    async def build() -> tuple[bytes, float | None]:
+        now = datetime.now(timezone.utc)
+        q = (
+            select(
+                Intent.id,
+                Intent.user_id,
+                Intent.origin_lat,
+                Intent.origin_lng,
+                Intent.dest_lat,
+                Intent.dest_lng,
+                Intent.start_time,
+                Intent.end_time,
+                Intent.expires_at,
+                Intent.created_at,
+            )
+            .where(Intent.user_id == current_user.id)
+            .where(Intent.expires_at > now)
+            .order_by(Intent.created_at.desc())
         )
-        for r in rows
-    ]
+        result = await db.execute(q)
+        rows = result.all()
+        items = [
+            IntentResponse(
+                id=r.id,
+                user_id=r.user_id,
+                origin_lat=float(r.origin_lat),
+                origin_lng=float(r.origin_lng),
+                dest_lat=float(r.dest_lat),
+                dest_lng=float(r.dest_lng),
+                start_time=r.start_time,
+                end_time=r.end_time,
+                expires_at=r.expires_at,
+                created_at=r.created_at,
+            )
+            for r in rows
+        ]
+        ttl_s = min(((r.expires_at - now).total_seconds() for r in rows), default=None)
+        return _INTENT_LIST.dump_json(items), ttl_s
+
+    body = await response_cache.cached("intents", current_user.id, build)
+    return Response(content=body, media_type="application/json")
 
 
 @router.delete("/{intent_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -135,46 +141,47 @@ async def delete_intent(
         raise HTTPException(status_code=403, detail="Not your intent")
     # Collect user ids of affected sessions (for WebSocket notify) before cascade delete
     sessions_result = await db.execute(
-        select(Session.user_a_id, Session.user_b_id).where(
+        select(Session.id, Session.user_a_id, Session.user_b_id, Session.sos_at).where(
             (Session.intent_a_id == intent_id) | (Session.intent_b_id == intent_id)
         )
     )
-    affected_user_ids = set()
-    for row in sessions_result.all():
-        affected_user_ids.add(row.user_a_id)
-        affected_user_ids.add(row.user_b_id)
+    affected = sessions_result.all()
+    if affected:
+        affected_ids = [row.id for row in affected]
+        await db.execute(delete(SessionMember).where(SessionMember.session_id.in_(affected_ids)))
+        await db.execute(delete(Rating).where(Rating.session_id.in_(affected_ids)))
     await db.delete(intent)
-    await db.flush()
-    await updates_manager.notify_user(current_user.id, {"type": "intents"})
-    await updates_manager.notify_users(list(affected_user_ids), {"type": "sessions"})
+    await db.commit()
+    if affected:
+        await clear_sessions(
+            await get_redis(), [row.id for row in affected], [row.id for row in affected if row.sos_at]
+        )
+    await updates_manager.notify_many(
+        [([current_user.id], intent_delete(intent_id))]
+        + [([row.user_a_id, row.user_b_id], session_delete(row.id)) for row in affected]
+    )
     return None
 
 
 @router.get("/matches", response_model=list[MatchCardResponse])
 async def get_matches(
     intent_id: int,
+    scoring: Literal["haversine", "walking"] | None = None,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    """Return match cards (other intents) ranked by buddy score. Includes route-overlap matches and, if origin is at a bus stop, others at same stop in last 2 min)."""
+    """Return match cards (other intents) ranked by buddy score. Includes route-overlap matches and, if origin is at a bus stop, others at same stop in last 2 min). scoring overrides settings.MATCH_SCORING."""
     result = await db.execute(select(Intent).where(Intent.id == intent_id))
     intent = result.scalar_one_or_none()
     if not intent:
         raise HTTPException(status_code=404, detail="Intent not found")
     if intent.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not your intent")
-    # Get origin coords for optional same-stop merge
-    origin_result = await db.execute(
-        select(
-            func.ST_Y(Intent.origin).label("origin_lat"),
-            func.ST_X(Intent.origin).label("origin_lng"),
-        ).where(Intent.id == intent_id)
-    )
-    origin_row = origin_result.one_or_none()
-    origin_lat = float(origin_row.origin_lat) if origin_row else None
-    origin_lng = float(origin_row.origin_lng) if origin_row else None
+    # Origin coords for optional same-stop merge
+    origin_lat = intent.origin_lat
+    origin_lng = intent.origin_lng
 
-    matches = await find_matches(db, intent_id)
+    matches = await find_matches(db, intent_id, scoring=scoring)
     cards = []
     seen_intent_ids = set()
     for m in matches:
@@ -272,10 +279,10 @@ async def _nearby_from_stop(
         select(
             Intent.id,
             Intent.user_id,
-            func.ST_Y(Intent.origin).label("origin_lat"),
-            func.ST_X(Intent.origin).label("origin_lng"),
-            func.ST_Y(Intent.destination).label("dest_lat"),
-            func.ST_X(Intent.destination).label("dest_lng"),
+            Intent.origin_lat,
+            Intent.origin_lng,
+            Intent.dest_lat,
+            Intent.dest_lng,
             User.name,
             User.avatar_url,
             User.has_vehicle,
@@ -311,10 +318,10 @@ async def get_nearby_intents_from_bus_stop(
             Intent.id,
             Intent.user_id,
             Intent.created_at,
-            func.ST_Y(Intent.origin).label("origin_lat"),
-            func.ST_X(Intent.origin).label("origin_lng"),
-            func.ST_Y(Intent.destination).label("dest_lat"),
-            func.ST_X(Intent.destination).label("dest_lng"),
+            Intent.origin_lat,
+            Intent.origin_lng,
+            Intent.dest_lat,
+            Intent.dest_lng,
             User.name,
             User.avatar_url,
             User.has_vehicle,
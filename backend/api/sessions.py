@@ -2,55 +2,49 @@
 import secrets
 from datetime import datetime, timezone
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from pydantic import TypeAdapter
+from sqlalchemy import func, insert, literal, select, union
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.sql import func
+from sqlalchemy.orm import aliased
 
 from backend.database import get_db
 from backend.deps import get_current_user
+from backend.models.archive import SessionArchive
 from backend.models.intent import Intent
-from backend.models.session import Session, SessionState
+from backend.models.session import LIVE_STATES, Session, SessionState
+from backend.models.session_member import SessionMember
 from backend.models.user import User
 from backend.redis_client import get_redis
-from backend.schemas.session import RoutePoint, RoutePoints, SessionCreate, SessionResponse
-from backend.services.location_store import get_locations
-from backend.services.state_machine import transition
-from backend.services.ws_updates import updates_manager
+from backend.schemas.session import (
+    RoutePoint,
+    RoutePoints,
+    SessionCreate,
+    SessionHistoryPage,
+    SessionResponse,
+)
+from backend.services import deadlines, response_cache
+from backend.services.location_store import get_locations, get_trail, keep_trail
+from backend.services.session_events import (
+    meeting_point_for,
+    notify_session,
+    release_live_state,
+    session_to_response,
+)
+from backend.services.session_history import InvalidCursor, history_page
+from backend.services.session_routes import route_points_by_intent
+from backend.services.state_machine import NotAParty, SessionNotFound, TransitionConflict, transition
 
 router = APIRouter(prefix="/sessions", tags=["sessions"])
 
+_SESSION_LIST = TypeAdapter(list[SessionResponse])
 
-def _session_to_response(
-    session: Session,
-    current_user_id: int,
-    route_a: RoutePoints | None = None,
-    route_b: RoutePoints | None = None,
-) -> SessionResponse:
-    my_side = None
-    my_token = None
-    if session.user_a_id == current_user_id:
-        my_side = "a"
-        my_token = session.token_a
-    elif session.user_b_id == current_user_id:
-        my_side = "b"
-        my_token = session.token_b
-    return SessionResponse(
-        id=session.id,
-        intent_a_id=session.intent_a_id,
-        intent_b_id=session.intent_b_id,
-        user_a_id=session.user_a_id,
-        user_b_id=session.user_b_id,
-        state=session.state,
-        started_at=session.started_at,
-        ends_at=session.ends_at,
-        max_duration_minutes=session.max_duration_minutes,
-        created_at=session.created_at,
-        my_side=my_side,
-        my_token=my_token,
-        sos_at=getattr(session, "sos_at", None),
-        route_a=route_a,
-        route_b=route_b,
+
+def _route_points(o_lat, o_lng, d_lat, d_lng) -> RoutePoints:
+    return RoutePoints(
+        origin=RoutePoint(lat=float(o_lat), lng=float(o_lng)),
+        destination=RoutePoint(lat=float(d_lat), lng=float(d_lng)),
     )
 
 
@@ -60,79 +54,99 @@ async def create_session(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    """Create a session linking two intents (both must exist). One active session per user per side."""
-    r_a = await db.execute(select(Intent).where(Intent.id == body.intent_a_id))
-    r_b = await db.execute(select(Intent).where(Intent.id == body.intent_b_id))
-    intent_a = r_a.scalar_one_or_none()
-    intent_b = r_b.scalar_one_or_none()
-    if not intent_a or not intent_b:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Intent not found")
-    if intent_a.id == intent_b.id:
+    """
+    Create a session linking two intents (both must exist). One live session per user, on either side,
+    enforced by the sessions_one_live_per_user constraint. A single INSERT ... SELECT ... RETURNING orders the
+    pair (current user is user_a), inserts it and returns it with both routes; the rare failure paths do one
+    more query to pick the right error. The meeting point is then picked once and stored on the session.
+    """
+    if body.intent_a_id == body.intent_b_id:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Use two different intents")
-    if current_user.id != intent_a.user_id and current_user.id != intent_b.user_id:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="You must own one of the intents")
-    non_terminal = [SessionState.REQUESTED, SessionState.ACCEPTED, SessionState.ACTIVE]
-    my_active = await db.execute(
-        select(Session.id).where(
-            (Session.user_a_id == current_user.id) | (Session.user_b_id == current_user.id)
-        ).where(Session.state.in_(non_terminal))
-    )
-    if my_active.scalar_one_or_none() is not None:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="You already have an active session. Complete or abort it first.",
+    ids = [body.intent_a_id, body.intent_b_id]
+    mine, other = aliased(Intent), aliased(Intent)
+    pair = (
+        select(
+            mine.id,
+            other.id,
+            mine.user_id,
+            other.user_id,
+            literal(SessionState.REQUESTED, Session.state.type),
+            literal(secrets.token_urlsafe(32)),
+            literal(secrets.token_urlsafe(32)),
         )
-    other_user_id = intent_b.user_id if current_user.id == intent_a.user_id else intent_a.user_id
-    other_active = await db.execute(
-        select(Session.id).where(
-            (Session.user_a_id == other_user_id) | (Session.user_b_id == other_user_id)
-        ).where(Session.state.in_(non_terminal))
+        .where(mine.id.in_(ids), other.id.in_(ids), mine.id != other.id, mine.user_id == current_user.id)
+        # Both intents mine: keep the order given
+        .order_by((mine.id == body.intent_a_id).desc())
+        .limit(1)
     )
-    if other_active.scalar_one_or_none() is not None:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="That user already has an active session. Try another match.",
+    inserted = (
+        insert(Session)
+        .from_select(["intent_a_id", "intent_b_id", "user_a_id", "user_b_id", "state", "token_a", "token_b"], pair)
+        .returning(*Session.__table__.c)
+        .cte("inserted")
+    )
+    # Both parties' history rows, written by the same statement (one row when both intents are mine)
+    members = (
+        insert(SessionMember)
+        .from_select(
+            ["user_id", "created_at", "session_id"],
+            union(
+                select(inserted.c.user_a_id, inserted.c.created_at, inserted.c.id),
+                select(inserted.c.user_b_id, inserted.c.created_at, inserted.c.id),
+            ),
         )
-    # Ensure consistent order: current user is user_a if they own intent_a
-    if current_user.id == intent_b.user_id:
-        intent_a, intent_b = intent_b, intent_a
-    token_a = secrets.token_urlsafe(32)
-    token_b = secrets.token_urlsafe(32)
-    session = Session(
-        intent_a_id=intent_a.id,
-        intent_b_id=intent_b.id,
-        user_a_id=intent_a.user_id,
-        user_b_id=intent_b.user_id,
-        state=SessionState.REQUESTED,
-        token_a=token_a,
-        token_b=token_b,
+        .cte("members")
     )
-    db.add(session)
-    await db.flush()
-    await db.refresh(session)
-    q_route = (
+    new_session = aliased(Session, inserted)
+    intent_a, intent_b = aliased(Intent), aliased(Intent)
+    q = (
         select(
-            Intent.id,
-            func.ST_Y(Intent.origin).label("oy"),
-            func.ST_X(Intent.origin).label("ox"),
-            func.ST_Y(Intent.destination).label("dy"),
-            func.ST_X(Intent.destination).label("dx"),
-        ).where(Intent.id.in_([intent_a.id, intent_b.id]))
-    )
-    r_route = await db.execute(q_route)
-    route_by_id = {}
-    for row in r_route.all():
-        route_by_id[row.id] = RoutePoints(
-            origin=RoutePoint(lat=float(row.oy), lng=float(row.ox)),
-            destination=RoutePoint(lat=float(row.dy), lng=float(row.dx)),
+            new_session,
+            intent_a.origin_lat,
+            intent_a.origin_lng,
+            intent_a.dest_lat,
+            intent_a.dest_lng,
+            intent_b.origin_lat,
+            intent_b.origin_lng,
+            intent_b.dest_lat,
+            intent_b.dest_lng,
         )
-    await updates_manager.notify_users([intent_a.user_id, intent_b.user_id], {"type": "sessions"})
-    return _session_to_response(
-        session,
-        current_user.id,
-        route_a=route_by_id.get(intent_a.id),
-        route_b=route_by_id.get(intent_b.id),
+        .join(intent_a, intent_a.id == new_session.intent_a_id)
+        .join(intent_b, intent_b.id == new_session.intent_b_id)
+        .add_cte(members)
     )
+    try:
+        async with db.begin_nested():
+            row = (await db.execute(q)).one_or_none()
+    except IntegrityError:
+        mine_live = await db.execute(
+            select(Session.id)
+            .where((Session.user_a_id == current_user.id) | (Session.user_b_id == current_user.id))
+            .where(Session.state.in_(LIVE_STATES))
+            .limit(1)
+        )
+        if mine_live.scalar_one_or_none() is not None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="You already have an active session. Complete or abort it first.",
+            )
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="That user already has an active session. Try another match.",
+        )
+    if row is None:
+        found = await db.execute(select(func.count()).select_from(Intent).where(Intent.id.in_(ids)))
+        if found.scalar_one() < 2:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Intent not found")
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="You must own one of the intents")
+    session = row[0]
+    route_a, route_b = _route_points(*row[1:5]), _route_points(*row[5:9])
+    meeting_point = meeting_point_for(route_a, route_b)
+    session.meeting_point = meeting_point.model_dump() if meeting_point else None
+    # Commit before pushing: a client acting on the delta must find the row
+    await db.commit()
+    await notify_session(session, route_a, route_b)
+    return session_to_response(session, current_user.id, route_a=route_a, route_b=route_b)
 
 
 @router.get("/me", response_model=list[SessionResponse])
@@ -140,46 +154,60 @@ async def list_my_sessions(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    """List sessions where the current user is party A or B (non-terminal states only by default)."""
-    q = select(Session).where(
-        (Session.user_a_id == current_user.id) | (Session.user_b_id == current_user.id)
-    ).where(Session.state.notin_([SessionState.COMPLETED, SessionState.ABORTED])).order_by(Session.created_at.desc())
-    result = await db.execute(q)
-    sessions = result.scalars().all()
-    if not sessions:
-        return []
-    intent_ids = set()
-    for s in sessions:
-        intent_ids.add(s.intent_a_id)
-        intent_ids.add(s.intent_b_id)
-    route_by_intent = {}
-    q_intents = (
-        select(
-            Intent.id,
-            func.ST_Y(Intent.origin).label("origin_lat"),
-            func.ST_X(Intent.origin).label("origin_lng"),
-            func.ST_Y(Intent.destination).label("dest_lat"),
-            func.ST_X(Intent.destination).label("dest_lng"),
-        ).where(Intent.id.in_(intent_ids))
-    )
-    r_intents = await db.execute(q_intents)
-    for row in r_intents.all():
-        route_by_intent[row.id] = RoutePoints(
-            origin=RoutePoint(lat=float(row.origin_lat), lng=float(row.origin_lng)),
-            destination=RoutePoint(lat=float(row.dest_lat), lng=float(row.dest_lng)),
-        )
-    return [
-        _session_to_response(
-            s,
-            current_user.id,
-            route_a=route_by_intent.get(s.intent_a_id),
-            route_b=route_by_intent.get(s.intent_b_id),
-        )
-        for s in sessions
-    ]
+    """List sessions where the current user is party A or B (non-terminal states only), cached per user."""
+
+    async def build() -> tuple[bytes, float | None]:
+        q = select(Session).where(
+            (Session.user_a_id == current_user.id) | (Session.user_b_id == current_user.id)
+        ).where(Session.state.notin_([SessionState.COMPLETED, SessionState.ABORTED])).order_by(Session.created_at.desc())
+        result = await db.execute(q)
+        sessions = result.scalars().all()
+        intent_ids = set()
+        for s in sessions:
+            intent_ids.add(s.intent_a_id)
+            intent_ids.add(s.intent_b_id)
+        route_by_intent = await route_points_by_intent(db, intent_ids) if sessions else {}
+        items = [
+            session_to_response(
+                s,
+                current_user.id,
+                route_a=route_by_intent.get(s.intent_a_id),
+                route_b=route_by_intent.get(s.intent_b_id),
+            )
+            for s in sessions
+        ]
+        return _SESSION_LIST.dump_json(items), None
+
+    body = await response_cache.cached("sessions", current_user.id, build)
+    return Response(content=body, media_type="application/json")
 
 
-def _get_my_token(session: Session, user_id: int) -> str:
+@router.get("/history", response_model=SessionHistoryPage)
+async def list_session_history(
+    cursor: str | None = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """All of the current user's sessions in any state, including archived ones, newest first."""
+    try:
+        return await history_page(db, current_user.id, limit, cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+async def _find_session(db: AsyncSession, session_id: int) -> Session | SessionArchive:
+    """The session from sessions, else from sessions_archive (an SOS trail outlives the move); 404 if neither."""
+    session = (await db.execute(select(Session).where(Session.id == session_id))).scalar_one_or_none()
+    if session is None:
+        archived = await db.execute(select(SessionArchive).where(SessionArchive.id == session_id).limit(1))
+        session = archived.scalar_one_or_none()
+    if session is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
+    return session
+
+
+def _get_my_token(session: Session | SessionArchive, user_id: int) -> str:
     if session.user_a_id == user_id:
         return session.token_a
     if session.user_b_id == user_id:
@@ -193,17 +221,22 @@ async def _do_transition(
     db: AsyncSession,
     current_user: User,
 ):
-    result = await db.execute(select(Session).where(Session.id == session_id))
-    session = result.scalar_one_or_none()
-    if not session:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
-    token = _get_my_token(session, current_user.id)
     try:
-        session = await transition(db, session_id, to_state, token)
-    except ValueError as e:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
-    await updates_manager.notify_users([session.user_a_id, session.user_b_id], {"type": "sessions"})
-    return _session_to_response(session, current_user.id)
+        session = await transition(db, session_id, to_state, user_id=current_user.id)
+    except SessionNotFound as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except NotAParty as e:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
+    except TransitionConflict as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    # Committed before any side effect or push, e.g. a mux join sent on seeing ACTIVE must find it ACTIVE
+    await db.commit()
+    if session.state == SessionState.ACTIVE and session.ends_at is not None:
+        await deadlines.schedule(await get_redis(), session.id, session.ends_at.timestamp())
+    if session.state in (SessionState.COMPLETED, SessionState.ABORTED):
+        await release_live_state(session)
+    await notify_session(session)
+    return session_to_response(session, current_user.id)
 
 
 @router.post("/{session_id}/accept", response_model=SessionResponse)
@@ -261,8 +294,11 @@ async def session_sos(
     session.sos_at = datetime.now(timezone.utc)
     await db.flush()
     await db.refresh(session)
-    await updates_manager.notify_users([session.user_a_id, session.user_b_id], {"type": "sessions"})
-    return _session_to_response(session, current_user.id)
+    await db.commit()
+    # The trail is what gets replayed after an SOS: keep it past the session's end
+    await keep_trail(await get_redis(), session.id)
+    await notify_session(session)
+    return session_to_response(session, current_user.id)
 
 
 @router.get("/{session_id}/locations")
@@ -272,12 +308,25 @@ async def session_locations(
     current_user: User = Depends(get_current_user),
 ):
     """Get current live locations for both parties (ACTIVE session only; from Redis)."""
-    result = await db.execute(select(Session).where(Session.id == session_id))
-    session = result.scalar_one_or_none()
-    if not session:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
+    session = await _find_session(db, session_id)
     _get_my_token(session, current_user.id)
     if session.state != SessionState.ACTIVE:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Session not active")
     redis = await get_redis()
     return await get_locations(redis, session_id)
+
+
+@router.get("/{session_id}/trail")
+async def session_trail(
+    session_id: int,
+    since: float | None = Query(None, description="Unix seconds; entries received at or after"),
+    until: float | None = Query(None, description="Unix seconds; entries received at or before"),
+    limit: int = Query(200, ge=1, le=1000),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Recent fixes of both parties, oldest first (any state, while the trail has not expired; e.g. after SOS)."""
+    session = await _find_session(db, session_id)
+    _get_my_token(session, current_user.id)
+    redis = await get_redis()
+    return await get_trail(redis, session_id, since=since, until=until, limit=limit)
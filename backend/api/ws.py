@@ -1,75 +1,382 @@
-"""WebSocket: live location for ACTIVE sessions; real-time updates channel for sessions/intents."""
+"""WebSocket: live location for ACTIVE sessions; real-time updates channel for sessions/intents; both multiplexed on /ws/mux."""
 import json
+import logging
+import time
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.auth.jwt import decode_token
 from backend.database import async_session
 from backend.models.session import Session, SessionState
 from backend.redis_client import get_redis
-from backend.services.location_store import set_location
+from backend.config import settings
+from backend.services import metrics
+from backend.services.eta import eta_service
+from backend.services.geofence import geofence_service
+from backend.services.location_codec import (
+    SUBPROTOCOL,
+    FrameError,
+    check_times,
+    decode_fixes,
+    decode_mux,
+    json_fix,
+)
+from backend.services.location_store import (
+    claim_completion,
+    feed_channel,
+    get_locations,
+    SessionEnded,
+    set_locations,
+    trail_expiry,
+)
+from backend.services.pubsub import location_hub
+from backend.services.session_events import notify_session, release_live_state
+from backend.services.session_routes import route_points_by_intent
+from backend.services.state_machine import transition
 from backend.services.ws_updates import updates_manager
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(tags=["ws"])
 
+# Close code for binary frames on a socket that did not negotiate SUBPROTOCOL
+UNSUPPORTED_DATA_CLOSE_CODE = 1003
+
 
 @router.websocket("/ws/sessions/{session_id}")
 async def session_location_ws(websocket: WebSocket, session_id: int):
-    """Accept connection with query ?token=...; session must be ACTIVE. Receive { lat, lng } and store in Redis."""
-    await websocket.accept()
+    """
+    Accept connection with query ?token=...; session must be ACTIVE. Receive { lat, lng } and store in Redis.
+    Pushes { type: 'location', party, lat, lng } for every fix in the session (from any worker, via Redis
+    pub/sub), starting with the last known position of each party.
+    Clients offering the SUBPROTOCOL subprotocol may also send binary frames carrying batches of timestamped
+    fixes (see location_codec). Malformed frames get { type: 'error', code: 4000, detail }. A fix sent after
+    the session has ended closes the socket with 4001.
+    Everything goes out through the socket's bounded writer queue (updates_manager), never from the hub reader.
+    """
+    binary = await _accept(websocket)
     token = websocket.query_params.get("token")
     if not token:
         await websocket.close(code=4000)
         return
-    async with async_session() as db:
-        result = await db.execute(select(Session).where(Session.id == session_id))
-        session = result.scalar_one_or_none()
-    if not session or session.state != SessionState.ACTIVE:
-        await websocket.close(code=4001)
-        return
-    if token not in (session.token_a, session.token_b):
-        await websocket.close(code=4002)
+    opened = await _open_session(session_id, token=token)
+    if isinstance(opened, int):
+        await websocket.close(code=opened)
         return
-    party = "a" if token == session.token_a else "b"
+    party, user_ids, trail_expires_at = opened
+    user_id = user_ids[0] if party == "a" else user_ids[1]
+    await updates_manager.connect(user_id, websocket, updates=False)
     redis = await get_redis()
+
+    def send(text: str) -> None:
+        updates_manager.send(user_id, websocket, text)
+
+    async def push(data: bytes) -> None:
+        send(data.decode() if isinstance(data, bytes) else data)
+
+    channel = feed_channel(session_id)
+    await location_hub.subscribe(channel, push)
     try:
+        for frame in await _snapshot(redis, session_id):
+            send(frame)
         while True:
-            data = await websocket.receive_text()
+            message = await _receive(websocket, binary)
             try:
-                obj = json.loads(data)
-                lat = float(obj.get("lat", 0))
-                lng = float(obj.get("lng", 0))
-                await set_location(redis, session_id, party, lat, lng)
-            except (KeyError, TypeError, ValueError):
-                pass
+                if message.get("bytes") is not None:
+                    fixes = decode_fixes(message["bytes"])
+                    _check_times(fixes)
+                else:
+                    obj = json.loads(message.get("text") or "")
+                    fixes = [json_fix(obj)]
+            except ValueError as e:
+                metrics.incr("location.frames_rejected")
+                send(json.dumps({"type": "error", "code": 4000, "detail": str(e)}))
+                continue
+            try:
+                await _ingest_fixes(redis, session_id, party, user_ids, fixes, trail_expires_at)
+            except SessionEnded:
+                await websocket.close(code=4001)
+                return
     except WebSocketDisconnect:
         pass
+    finally:
+        await location_hub.unsubscribe(channel, push)
+        await updates_manager.disconnect(user_id, websocket)
+
+
+async def _open_session(
+    session_id: int, token: str | None = None, user_id: int | None = None
+) -> tuple[str, list[int], float] | int:
+    """
+    Check the caller may stream locations for the session (by session token or by user id) and register it
+    with the ETA service. Returns (party, [user_a_id, user_b_id], trail expiry) or a close code: 4001 not
+    ACTIVE, 4002 not a party.
+    """
+    async with async_session() as db:
+        result = await db.execute(select(Session).where(Session.id == session_id))
+        session = result.scalar_one_or_none()
+        if not session or session.state != SessionState.ACTIVE:
+            return 4001
+        if token is not None:
+            if token not in (session.token_a, session.token_b):
+                return 4002
+            party = "a" if token == session.token_a else "b"
+        elif user_id == session.user_a_id:
+            party = "a"
+        elif user_id == session.user_b_id:
+            party = "b"
+        else:
+            return 4002
+        routes = await route_points_by_intent(db, [session.intent_a_id, session.intent_b_id])
+    _register_tracking(session, routes)
+    return party, [session.user_a_id, session.user_b_id], trail_expiry(session.ends_at)
+
+
+async def _snapshot(redis, session_id: int) -> list[str]:
+    """Last known position of each party, as location frames."""
+    return [
+        json.dumps({"type": "location", "session_id": session_id, "party": side, **loc})
+        for side, loc in (await get_locations(redis, session_id)).items()
+    ]
+
+
+async def _accept(websocket: WebSocket) -> bool:
+    """Accept, selecting the binary location subprotocol when the client offers it; True if it was selected."""
+    binary = SUBPROTOCOL in (websocket.scope.get("subprotocols") or [])
+    await websocket.accept(subprotocol=SUBPROTOCOL if binary else None)
+    return binary
+
+
+async def _receive(websocket: WebSocket, binary: bool) -> dict:
+    """
+    Next text or binary message; raises WebSocketDisconnect like receive_text does. A binary message on a socket
+    that did not negotiate SUBPROTOCOL closes it with 1003 (unsupported data).
+    """
+    message = await websocket.receive()
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", 1000))
+    if message.get("bytes") is not None and not binary:
+        metrics.incr("location.frames_rejected")
+        await websocket.close(code=UNSUPPORTED_DATA_CLOSE_CODE)
+        raise WebSocketDisconnect(UNSUPPORTED_DATA_CLOSE_CODE)
+    return message
+
+
+def _check_times(fixes: list[tuple[float, float, float]]) -> None:
+    """Reject binary fixes whose client timestamps are far from server time (they drive the ETA speed estimate)."""
+    check_times(fixes, time.time(), settings.LOCATION_FIX_MAX_AGE_SECONDS, settings.LOCATION_FIX_MAX_SKEW_SECONDS)
+
+
+async def _ingest_fixes(
+    redis,
+    session_id: int,
+    party: str,
+    user_ids: list[int],
+    fixes: list[tuple[float, float, float | None]],
+    trail_expires_at: float,
+) -> None:
+    """
+    Run a batch of fixes through ETA and geofences, store and fan them out (one write, which also merges the
+    party's ETA and arrival with the peer's), then push both ETAs and any geofence events to both parties.
+    Completes the session when both have arrived, if enabled; the claim is in Redis, so exactly one worker does.
+    """
+    eta = None
+    frames = []
+    for lat, lng, ts in fixes:
+        eta = eta_service.update(session_id, party, lat, lng, ts) or eta
+        for event in geofence_service.evaluate(session_id, party, lat, lng):
+            frames.append((user_ids, {"type": "geofence", "session_id": session_id, **event}))
+    # Both parties' latest ETA and arrival, whichever workers their sockets are on
+    states = await set_locations(
+        redis,
+        session_id,
+        party,
+        fixes,
+        eta=eta,
+        trail_expires_at=trail_expires_at,
+        at_destination=geofence_service.at_destination(session_id, party),
+    )
+    metrics.incr("location.fixes_ingested", len(fixes))
+    if states and states.etas:
+        frames.append((user_ids, {"type": "eta", "session_id": session_id, "eta": states.etas}))
+    if frames:
+        await updates_manager.notify_many(frames)
+    if (
+        settings.GEOFENCE_AUTO_COMPLETE
+        and states
+        and states.arrived >= {"a", "b"}
+        and await claim_completion(redis, session_id)
+    ):
+        await _auto_complete(session_id)
+
+
+async def _auto_complete(session_id: int) -> None:
+    """
+    Move the session to COMPLETED through the state machine (a no-op if someone ended it first). Failures are
+    logged rather than raised: the fix that triggered it has been stored and the socket stays up.
+    """
+    try:
+        async with async_session() as db:
+            try:
+                session = await transition(db, session_id, SessionState.COMPLETED)
+            except ValueError:
+                return
+            await db.commit()
+        metrics.incr("geofence.auto_completed")
+        await release_live_state(session)
+        await notify_session(session)
+    except Exception:
+        metrics.incr("geofence.auto_complete_errors")
+        logger.exception("auto-completing session %s failed", session_id)
+
+
+def _register_tracking(session: Session, routes: dict) -> None:
+    """Give the ETA and geofence services both parties' targets: the session's meeting point, then each destination."""
+    route_a = routes.get(session.intent_a_id)
+    route_b = routes.get(session.intent_b_id)
+    mp = session.meeting_point
+    meeting_point = (mp["lat"], mp["lng"]) if mp else None
+    destinations = {
+        "a": (route_a.destination.lat, route_a.destination.lng) if route_a else None,
+        "b": (route_b.destination.lat, route_b.destination.lng) if route_b else None,
+    }
+    eta_service.register(session.id, meeting_point, destinations)
+    geofence_service.register(session.id, meeting_point, destinations)
+
+
+def _user_id_from_token(token: str | None) -> int | None:
+    payload = decode_token(token) if token else None
+    if not payload or "sub" not in payload:
+        return None
+    try:
+        return int(payload["sub"])
+    except (ValueError, TypeError):
+        return None
 
 
 @router.websocket("/ws/updates")
 async def updates_ws(websocket: WebSocket):
-    """Connect with ?token=JWT. Server pushes { type: 'sessions' } or { type: 'intents' } when data changes."""
+    """
+    Connect with ?token=JWT. When one of your sessions or intents changes, the server pushes the change itself:
+      { seq, type: 'sessions', op: 'upsert', session } / { seq, type: 'sessions', op: 'delete', session_id }
+      { seq, type: 'intents', op: 'upsert', intent } / { seq, type: 'intents', op: 'delete', intent_id }
+    seq counts up by one per user across all their sockets and workers; a gap means frames were missed, so
+    refetch the lists. Frames close together may arrive as one { type: 'batch', frames: [...] }.
+    """
     await websocket.accept()
     token = websocket.query_params.get("token")
     if not token:
         await websocket.close(code=4000)
         return
-    payload = decode_token(token)
-    if not payload or "sub" not in payload:
+    user_id = _user_id_from_token(token)
+    if user_id is None:
         await websocket.close(code=4001)
         return
+    await updates_manager.connect(user_id, websocket)
     try:
-        user_id = int(payload["sub"])
-    except (ValueError, TypeError):
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await updates_manager.disconnect(user_id, websocket)
+
+
+@router.websocket("/ws/mux")
+async def mux_ws(websocket: WebSocket):
+    """
+    One socket per client for everything live. Connect with ?token=JWT (checked once), then send op frames:
+      { op: 'sub' } / { op: 'unsub' }        start/stop session and intent update events
+      { op: 'join', s } / { op: 'leave', s } start/stop location frames for an ACTIVE session you are party to
+      { op: 'loc', s, lat, lng }             publish your own position in a joined session
+    With the SUBPROTOCOL subprotocol, a binary frame (session id + fix records, see location_codec) is a batched loc.
+    Server frames are the ones /ws/updates and /ws/sessions/{id} push (location frames carry session_id),
+    plus { type: 'ack', op, s? } and { type: 'error', op, s?, code } (codes as the close codes of those sockets).
+    Everything goes out through the socket's single bounded writer queue.
+    """
+    binary = await _accept(websocket)
+    token = websocket.query_params.get("token")
+    if not token:
+        await websocket.close(code=4000)
+        return
+    user_id = _user_id_from_token(token)
+    if user_id is None:
         await websocket.close(code=4001)
         return
-    updates_manager.connect(user_id, websocket)
+    await updates_manager.connect(user_id, websocket, updates=False)
+    redis = await get_redis()
+    # session_id -> (party, user_ids, trail expiry); one hub handler serves every joined session
+    joined: dict[int, tuple[str, list[int], float]] = {}
+
+    def reply(frame: dict) -> None:
+        updates_manager.send(user_id, websocket, json.dumps(frame))
+
+    async def push(data: bytes) -> None:
+        updates_manager.send(user_id, websocket, data.decode() if isinstance(data, bytes) else data)
+
     try:
         while True:
-            await websocket.receive_text()
+            message = await _receive(websocket, binary)
+            try:
+                if message.get("bytes") is not None:
+                    sid, fixes = decode_mux(message["bytes"])
+                    _check_times(fixes)
+                    frame = {"op": "loc", "s": sid}
+                else:
+                    frame = json.loads(message.get("text") or "")
+                    fixes = None
+                op = frame["op"]
+                sid = int(frame["s"]) if "s" in frame else None
+            except FrameError as e:
+                metrics.incr("location.frames_rejected")
+                reply({"type": "error", "op": "loc", "code": 4000, "detail": str(e)})
+                continue
+            except (KeyError, TypeError, ValueError):
+                reply({"type": "error", "op": None, "code": 4000})
+                continue
+            if op in ("sub", "unsub"):
+                updates_manager.set_updates(user_id, websocket, op == "sub")
+                reply({"type": "ack", "op": op})
+            elif op == "join" and sid is not None:
+                if sid not in joined:
+                    opened = await _open_session(sid, user_id=user_id)
+                    if isinstance(opened, int):
+                        reply({"type": "error", "op": op, "s": sid, "code": opened})
+                        continue
+                    joined[sid] = opened
+                    await location_hub.subscribe(feed_channel(sid), push)
+                reply({"type": "ack", "op": op, "s": sid})
+                for text in await _snapshot(redis, sid):
+                    updates_manager.send(user_id, websocket, text)
+            elif op == "leave" and sid is not None:
+                if joined.pop(sid, None) is not None:
+                    await location_hub.unsubscribe(feed_channel(sid), push)
+                reply({"type": "ack", "op": op, "s": sid})
+            elif op == "loc" and sid is not None:
+                if sid not in joined:
+                    reply({"type": "error", "op": op, "s": sid, "code": 4001})
+                    continue
+                if fixes is None:
+                    try:
+                        fixes = [json_fix(frame)]
+                    except FrameError as e:
+                        metrics.incr("location.frames_rejected")
+                        reply({"type": "error", "op": op, "s": sid, "code": 4000, "detail": str(e)})
+                        continue
+                party, user_ids, trail_expires_at = joined[sid]
+                try:
+                    await _ingest_fixes(redis, sid, party, user_ids, fixes, trail_expires_at)
+                except SessionEnded:
+                    # No longer ACTIVE: leave it, as if the client had sent leave
+                    del joined[sid]
+                    await location_hub.unsubscribe(feed_channel(sid), push)
+                    reply({"type": "error", "op": op, "s": sid, "code": 4001})
+            else:
+                reply({"type": "error", "op": op, "code": 4000})
     except WebSocketDisconnect:
         pass
     finally:
-        updates_manager.disconnect(user_id, websocket)
+        for sid in joined:
+            await location_hub.unsubscribe(feed_channel(sid), push)
+        await updates_manager.disconnect(user_id, websocket)
@@ -1,10 +1,19 @@
 """Create and decode JWT access tokens."""
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
 from typing import Any
 
 from jose import JWTError, jwt
 
 from backend.config import settings
+from backend.services import metrics
+
+# token -> (exp as unix seconds, payload)
+_decoded: "OrderedDict[str, tuple[float, dict[str, Any]]]" = OrderedDict()
+
+metrics.register_gauge("auth.jwt_cache_size", lambda: len(_decoded))
+metrics.register_gauge("auth.jwt_cache_hit_rate", lambda: metrics.ratio("auth.jwt_cache_hits", "auth.jwt_lookups"))
 
 
 def create_access_token(data: dict[str, Any], expires_delta: timedelta | None = None) -> str:
@@ -17,9 +26,24 @@ def create_access_token(data: dict[str, Any], expires_delta: timedelta | None =
 
 
 def decode_token(token: str) -> dict[str, Any] | None:
-    """Decode and validate JWT; return payload or None if invalid/expired."""
+    """
+    Decode and validate JWT; return payload or None if invalid/expired. Valid payloads are memoized (LRU of
+    JWT_CACHE_MAX) until their exp, so repeat requests with the same token skip the signature check.
+    """
+    metrics.incr("auth.jwt_lookups")
+    hit = _decoded.get(token)
+    if hit is not None:
+        if hit[0] > time.time():
+            _decoded.move_to_end(token)
+            metrics.incr("auth.jwt_cache_hits")
+            return hit[1]
+        del _decoded[token]
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
-        return payload
     except JWTError:
         return None
+    if "exp" in payload:
+        _decoded[token] = (float(payload["exp"]), payload)
+        while len(_decoded) > settings.JWT_CACHE_MAX:
+            _decoded.popitem(last=False)
+    return payload
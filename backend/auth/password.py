@@ -1,11 +1,32 @@
-"""Hash and verify passwords with bcrypt (no passlib)."""
+"""Hash and verify passwords with bcrypt (no passlib).
+
+The async variants run bcrypt on a dedicated pool of BCRYPT_WORKERS threads (bcrypt releases the GIL), so a
+hash never blocks the event loop. At most BCRYPT_QUEUE_MAX calls wait for a thread; beyond that they fail fast
+with HashingOverloaded instead of queueing behind seconds of work.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
 import bcrypt
 
+from backend.config import settings
+from backend.services import metrics
+
+_executor = ThreadPoolExecutor(max_workers=settings.BCRYPT_WORKERS, thread_name_prefix="bcrypt")
+# Calls running or waiting on _executor
+_pending = 0
+
+metrics.register_gauge("auth.bcrypt_pending", lambda: _pending)
+
+
+class HashingOverloaded(RuntimeError):
+    """The bcrypt pool and its queue are full."""
+
 
 def hash_password(plain: str) -> str:
     """Hash a plain password for storing in DB. Bcrypt limit is 72 bytes."""
     pw_bytes = plain.encode("utf-8")[:72]
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(pw_bytes, salt)
     return hashed.decode("ascii")
 
@@ -14,3 +35,34 @@ def verify_password(plain: str, hashed: str) -> bool:
     """Check plain password against stored hash."""
     pw_bytes = plain.encode("utf-8")[:72]
     return bcrypt.checkpw(pw_bytes, hashed.encode("ascii"))
+
+
+def needs_rehash(hashed: str) -> bool:
+    """True if hashed was made with a cost other than BCRYPT_ROUNDS ("$2b$<cost>$...")."""
+    try:
+        return int(hashed.split("$")[2]) != settings.BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return True
+
+
+async def _run(fn, *args):
+    global _pending
+    if _pending >= settings.BCRYPT_WORKERS + settings.BCRYPT_QUEUE_MAX:
+        metrics.incr("auth.bcrypt_rejected")
+        raise HashingOverloaded("Too many sign-ins in progress, try again shortly")
+    _pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_executor, fn, *args)
+    finally:
+        _pending -= 1
+        metrics.incr("auth.bcrypt_calls")
+
+
+async def hash_password_async(plain: str) -> str:
+    """hash_password on the bcrypt pool; raises HashingOverloaded when it is saturated."""
+    return await _run(hash_password, plain)
+
+
+async def verify_password_async(plain: str, hashed: str) -> bool:
+    """verify_password on the bcrypt pool; raises HashingOverloaded when it is saturated."""
+    return await _run(verify_password, plain, hashed)
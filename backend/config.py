@@ -15,6 +15,103 @@ class Settings(BaseSettings):
 
     # Session / location TTL (seconds)
     SESSION_LOCATION_TTL_SECONDS: int = 300
+    # Per-session location trail (Redis stream): max entries kept (both parties), how long it outlives the
+    # session's planned end (deleted early when the session ends), and how long it is kept after an SOS
+    LOCATION_TRAIL_MAXLEN: int = 600
+    LOCATION_TRAIL_AFTER_END_SECONDS: int = 300
+    LOCATION_TRAIL_SOS_RETAIN_SECONDS: int = 7 * 24 * 3600
+    # Client timestamps on binary fixes: oldest accepted (buffered while offline) and allowed clock skew ahead
+    LOCATION_FIX_MAX_AGE_SECONDS: int = 900
+    LOCATION_FIX_MAX_SKEW_SECONDS: int = 10
+
+    # OSRM walking directions: per-request latency budget and circuit breaker
+    OSRM_BASE_URL: str = "https://router.project-osrm.org"
+    OSRM_LATENCY_BUDGET_SECONDS: float = 2.0
+    OSRM_BREAKER_FAILURE_THRESHOLD: int = 5
+    OSRM_BREAKER_RESET_SECONDS: float = 30.0
+    # Cached walking distances/durations (OSRM table), keyed by snapped grid cell pair
+    WALK_CACHE_CELL_DEG: float = 0.0005  # ~50 m
+    WALK_CACHE_MAX_ENTRIES: int = 50000
+    # Match scoring: "haversine" (straight line) or "walking" (one batched OSRM table call per match request)
+    MATCH_SCORING: str = "haversine"
+    MATCH_OSRM_BUDGET_SECONDS: float = 0.8
+    # Used for straight-line fallbacks and ETA estimates (~5 km/h)
+    WALKING_SPEED_MPS: float = 1.4
+    # Straight-line distance x this factor approximates walking distance when no OSRM value is cached
+    WALK_DETOUR_FACTOR: float = 1.3
+    # Meeting point for a matched pair: minimize "sum" or "max" of both parties' walking time
+    MEETING_POINT_OBJECTIVE: str = "max"
+
+    # Live ETA: fixes kept per party, speed smoothing, and "reached meeting point" radius
+    ETA_TRAIL_LENGTH: int = 10
+    ETA_SPEED_ALPHA: float = 0.3
+    ETA_ARRIVAL_RADIUS_M: float = 30.0
+    ETA_MAX_SESSIONS: int = 10000
+
+    # Geocoding proxy: upstream "nominatim" or "stub" (offline), caches for upstream answers
+    GEOCODER_UPSTREAM: str = "nominatim"
+    NOMINATIM_BASE_URL: str = "https://nominatim.openstreetmap.org"
+    GEOCODER_TIMEOUT_SECONDS: float = 3.0
+    GEOCODE_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+    GEOCODE_LRU_MAX_ENTRIES: int = 5000
+    # Reverse lookups within this distance of a gazetteer place answer locally
+    GEOCODE_LOCAL_RADIUS_M: float = 60.0
+
+    # /ws/updates fanout across workers: "redis" (pub/sub, users sharded over UPDATES_SHARDS channels) or "local"
+    UPDATES_BROKER: str = "redis"
+    UPDATES_SHARDS: int = 64
+    # Per-socket outbound queue: overflow or a send blocked past the timeout disconnects the socket
+    UPDATES_QUEUE_MAX: int = 64
+    UPDATES_SEND_TIMEOUT_SECONDS: float = 5.0
+    # Coalescing: frames for a socket arriving within the window go out as one batch frame; the first frame
+    # of a batch is never held longer than the max delay. 0 disables.
+    UPDATES_COALESCE_WINDOW_MS: int = 25
+    UPDATES_COALESCE_MAX_DELAY_MS: int = 100
+
+    # Background jobs: leader lease TTL (one worker runs jobs) and random delay added per run (fraction of interval)
+    JOBS_LEASE_TTL_SECONDS: float = 10.0
+    JOBS_JITTER_FRACTION: float = 0.1
+
+    # Session auto-end: how often due deadlines are claimed, and how often they are re-synced from the table
+    AUTO_END_TICK_SECONDS: float = 0.5
+    AUTO_END_RECONCILE_SECONDS: float = 300.0
+
+    # Cached GET /sessions/me and /intents bodies per user (Redis): max age, and how long an invalidated entry
+    # is held off so reads racing the writer's commit do not re-cache the old list
+    RESPONSE_CACHE_TTL_SECONDS: float = 60.0
+    RESPONSE_CACHE_SETTLE_SECONDS: float = 2.0
+
+    # Authenticated-user cache per worker (LRU size, max age, hold-off after an edit) and decoded-JWT memo size
+    USER_CACHE_MAX: int = 10000
+    USER_CACHE_TTL_SECONDS: float = 60.0
+    USER_CACHE_SETTLE_SECONDS: float = 2.0
+    JWT_CACHE_MAX: int = 10000
+
+    # Password hashing: bcrypt cost (existing hashes are upgraded at login), pool threads, max calls waiting
+    BCRYPT_ROUNDS: int = 12
+    BCRYPT_WORKERS: int = 4
+    BCRYPT_QUEUE_MAX: int = 32
+    # Auth rate limits (Redis, shared by workers): attempts per window
+    AUTH_RATE_WINDOW_SECONDS: int = 300
+    LOGIN_RATE_PER_IP: int = 50
+    LOGIN_RATE_PER_ACCOUNT: int = 10
+    REGISTER_RATE_PER_IP: int = 10
+
+    # Archiving: finished sessions / expired intents move to monthly-partitioned archive tables, in batches;
+    # archive partitions older than the retention are detached into the cold schema
+    ARCHIVE_INTERVAL_SECONDS: float = 600.0
+    ARCHIVE_SESSIONS_AFTER_HOURS: int = 24
+    ARCHIVE_INTENTS_AFTER_MINUTES: int = 60
+    ARCHIVE_BATCH_SIZE: int = 5000
+    ARCHIVE_RETENTION_MONTHS: int = 6
+    ARCHIVE_COLD_SCHEMA: str = "archive_cold"
+
+    # Geofences on live fixes: radii (m), exit = radius x factor, divergence threshold (m), auto-complete on arrival
+    GEOFENCE_MEETING_RADIUS_M: float = 30.0
+    GEOFENCE_DESTINATION_RADIUS_M: float = 50.0
+    GEOFENCE_EXIT_FACTOR: float = 1.5
+    GEOFENCE_DIVERGE_M: float = 150.0
+    GEOFENCE_AUTO_COMPLETE: bool = False
 
     # Set to true to drop all tables and recreate on startup (fixes schema e.g. has_vehicle). All data is lost.
     RESET_DB: bool = False
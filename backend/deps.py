@@ -9,6 +9,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from backend.auth.jwt import decode_token
 from backend.database import get_db
 from backend.models.user import User
+from backend.services.user_cache import user_cache
 
 security = HTTPBearer(auto_error=False)
 
@@ -18,7 +19,10 @@ async def get_current_user(
     db: Annotated[AsyncSession, Depends(get_db)],
 ) -> User:
 #here depends means that the function get_current_user is a dependency of the endpoint. so first security is called, then get_db is called, then get_current_user is called.
-    """Validate JWT from Authorization: Bearer <token> and return the User. Raises 401 if missing/invalid."""
+    """
+    Validate JWT from Authorization: Bearer <token> and return the User (from services/user_cache when
+    possible). Raises 401 if missing/invalid.
+    """
     if not credentials:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
     payload = decode_token(credentials.credentials)
@@ -27,8 +31,13 @@ async def get_current_user(
     user_id = payload["sub"]
     if not user_id:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+    cached = user_cache.get(int(user_id))
+    if cached is not None:
+        # Attach without a SELECT so edits to the returned user still flush
+        return await db.merge(cached, load=False)
     result = await db.execute(select(User).where(User.id == int(user_id)))
     user = result.scalar_one_or_none() #returns the first row of the result or None if no rows are returned
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+    user_cache.put(user)
     return user
@@ -1,4 +1,3 @@
-import asyncio
 from contextlib import asynccontextmanager
 from pathlib import Path
 
@@ -9,6 +8,7 @@ from fastapi.staticfiles import StaticFiles
 import redis.asyncio as aioredis
 
 from backend.api.auth import router as auth_router
+from backend.api.geocode import router as geocode_router
 from backend.api.health import router as health_router
 from backend.api.guidance import router as guidance_router
 from backend.api.intents import router as intents_router
@@ -19,11 +19,18 @@ from backend.config import settings
 from backend.database import engine
 from backend.models import Base
 from backend.redis_client import set_redis
+from backend.services.pubsub import location_hub
+from backend.services.user_cache import user_cache, users_hub
+from backend.services.ws_updates import updates_hub
+import backend.models.archive  # noqa: F401
 import backend.models.intent  # noqa: F401
 import backend.models.rating  # noqa: F401
 import backend.models.session  # noqa: F401
+import backend.models.session_member  # noqa: F401
 import backend.models.user  # noqa: F401
-from backend.tasks.auto_end import run_auto_end_loop
+from backend.tasks.archive import run_archive_once
+from backend.tasks.auto_end import reconcile_deadlines, run_auto_end_once
+from backend.tasks.runner import job_runner
 
 
 @asynccontextmanager
@@ -34,15 +41,22 @@ async def lifespan(app: FastAPI):
         await conn.run_sync(Base.metadata.create_all)
     redis_client = aioredis.from_url(settings.REDIS_URL)
     set_redis(redis_client)
-    task = asyncio.create_task(run_auto_end_loop())
+    await location_hub.start(redis_client)
+    if settings.UPDATES_BROKER == "redis":
+        await updates_hub.start(redis_client)
+    await users_hub.start(redis_client)
+    await user_cache.start()
+    job_runner.add("auto_end", run_auto_end_once, settings.AUTO_END_TICK_SECONDS)
+    job_runner.add("auto_end_reconcile", reconcile_deadlines, settings.AUTO_END_RECONCILE_SECONDS)
+    job_runner.add("archive", run_archive_once, settings.ARCHIVE_INTERVAL_SECONDS)
+    await job_runner.start(redis_client)
     try:
         yield
     finally:
-        task.cancel()
-        try:
-            await task
-        except asyncio.CancelledError:
-            pass
+        await job_runner.stop()
+        await location_hub.stop()
+        await updates_hub.stop()
+        await users_hub.stop()
         await redis_client.close()
 
 
@@ -51,6 +65,7 @@ app.include_router(health_router, prefix="/api")
 app.include_router(auth_router, prefix="/api")
 app.include_router(stops_router, prefix="/api")
 app.include_router(guidance_router, prefix="/api")
+app.include_router(geocode_router, prefix="/api")
 app.include_router(intents_router, prefix="/api")
 app.include_router(sessions_router, prefix="/api")
 app.include_router(ws_router)
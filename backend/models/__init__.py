@@ -1,7 +1,9 @@
+from backend.models.archive import IntentArchive, SessionArchive
 from backend.models.base import Base
 from backend.models.intent import Intent
 from backend.models.rating import Rating
 from backend.models.session import Session, SessionState
+from backend.models.session_member import SessionMember
 from backend.models.user import User
 
-__all__ = ["Base", "User", "Intent", "Session", "SessionState", "Rating"]
+__all__ = ["Base", "User", "Intent", "Session", "SessionState", "Rating", "SessionMember", "IntentArchive", "SessionArchive"]
@@ -0,0 +1,50 @@
+"""Archive tables for intents and sessions that are no longer live, range-partitioned by month of created_at.
+
+Rows are moved here by tasks/archive so the hot tables (and their indexes) only hold live data. Partitions
+are created and detached by the same job; a detached partition is a plain table (cold storage) that can be
+dumped or dropped independently. No foreign keys: history must outlive users and intents.
+"""
+from datetime import datetime
+
+from sqlalchemy import DateTime, Enum, Float, Integer, String
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from backend.models.base import Base
+from backend.models.session import SessionState
+
+
+class IntentArchive(Base):
+    __tablename__ = "intents_archive"
+    __table_args__ = {"postgresql_partition_by": "RANGE (created_at)"}
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    user_id: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
+    origin_lat: Mapped[float] = mapped_column(Float, nullable=False)
+    origin_lng: Mapped[float] = mapped_column(Float, nullable=False)
+    dest_lat: Mapped[float] = mapped_column(Float, nullable=False)
+    dest_lng: Mapped[float] = mapped_column(Float, nullable=False)
+    start_time: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    end_time: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+
+class SessionArchive(Base):
+    __tablename__ = "sessions_archive"
+    __table_args__ = {"postgresql_partition_by": "RANGE (created_at)"}
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    intent_a_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    intent_b_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    user_a_id: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
+    user_b_id: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
+    state: Mapped[SessionState] = mapped_column(Enum(SessionState), nullable=False)
+    token_a: Mapped[str] = mapped_column(String(64), nullable=False)
+    token_b: Mapped[str] = mapped_column(String(64), nullable=False)
+    started_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    ends_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    max_duration_minutes: Mapped[int] = mapped_column(Integer, nullable=False)
+    sos_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    meeting_point: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
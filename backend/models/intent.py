@@ -2,20 +2,43 @@
 from datetime import datetime
 
 from geoalchemy2 import Geometry
-from sqlalchemy import DateTime, ForeignKey, Integer, func
+from sqlalchemy import Computed, DateTime, Float, ForeignKey, Index, Integer, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from backend.models.base import Base
 
+ORIGIN_POINT_SQL = "ST_SetSRID(ST_MakePoint(origin_lng, origin_lat), 4326)"
+DESTINATION_POINT_SQL = "ST_SetSRID(ST_MakePoint(dest_lng, dest_lat), 4326)"
+COORD_COLUMNS = ("origin_lat", "origin_lng", "dest_lat", "dest_lng")
+
 
 class Intent(Base):
     __tablename__ = "intents"
+    # Covering indexes so "my live intents" and lookups by id (routes, matching) are index-only scans
+    __table_args__ = (
+        Index(
+            "ix_intents_user_expires_covering",
+            "user_id",
+            "expires_at",
+            postgresql_include=[*COORD_COLUMNS, "start_time", "end_time", "created_at"],
+        ),
+        Index("ix_intents_id_coords", "id", postgresql_include=list(COORD_COLUMNS)),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
-    # PostGIS points: WGS84 (lng, lat). Stored as SRID=4326;POINT(lng lat)
-    origin: Mapped[str] = mapped_column(Geometry(geometry_type="POINT", srid=4326), nullable=False)
-    destination: Mapped[str] = mapped_column(Geometry(geometry_type="POINT", srid=4326), nullable=False)
+    # WGS84 coordinates as plain floats: what every read returns and every write sets
+    origin_lat: Mapped[float] = mapped_column(Float, nullable=False)
+    origin_lng: Mapped[float] = mapped_column(Float, nullable=False)
+    dest_lat: Mapped[float] = mapped_column(Float, nullable=False)
+    dest_lng: Mapped[float] = mapped_column(Float, nullable=False)
+    # PostGIS points generated from the floats (always in sync), only for spatial predicates (ST_DWithin)
+    origin: Mapped[str] = mapped_column(
+        Geometry(geometry_type="POINT", srid=4326), Computed(ORIGIN_POINT_SQL, persisted=True), deferred=True
+    )
+    destination: Mapped[str] = mapped_column(
+        Geometry(geometry_type="POINT", srid=4326), Computed(DESTINATION_POINT_SQL, persisted=True), deferred=True
+    )
     start_time: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     end_time: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, index=True)
@@ -1,4 +1,8 @@
-"""Rating model: post-session rating of one user by another (for buddy score)."""
+"""Rating model: post-session rating of one user by another (for buddy score).
+
+Ratings stay in the hot table for the matcher's averages after their session moves to sessions_archive, so
+session_id has no foreign key to sessions; rows are removed with the session when its intent is deleted.
+"""
 from datetime import datetime
 
 from sqlalchemy import DateTime, ForeignKey, Integer, func
@@ -13,6 +17,6 @@ class Rating(Base):
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     rater_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     ratee_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
-    session_id: Mapped[int] = mapped_column(ForeignKey("sessions.id", ondelete="CASCADE"), nullable=False, index=True)
+    session_id: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
     score: Mapped[int] = mapped_column(Integer, nullable=False)  # 1-5
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
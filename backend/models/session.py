@@ -2,7 +2,8 @@
 import enum
 from datetime import datetime
 
-from sqlalchemy import DateTime, Enum, ForeignKey, Integer, String, func
+from sqlalchemy import DDL, DateTime, Enum, ForeignKey, Integer, String, event, func, literal_column, text
+from sqlalchemy.dialects.postgresql import JSONB, ExcludeConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from backend.models.base import Base
@@ -16,8 +17,23 @@ class SessionState(str, enum.Enum):
     ABORTED = "ABORTED"
 
 
+LIVE_STATES = (SessionState.REQUESTED, SessionState.ACCEPTED, SessionState.ACTIVE)
+
+_PARTIES = "(ARRAY[user_a_id, user_b_id])"
+
+
 class Session(Base):
     __tablename__ = "sessions"
+    # A user can be in at most one non-terminal session, on either side: no two live rows share a party
+    __table_args__ = (
+        ExcludeConstraint(
+            (literal_column(_PARTIES), "&&"),
+            name="sessions_one_live_per_user",
+            using="gist",
+            ops={_PARTIES: "gist__int_ops"},
+            where=text("state IN (%s)" % ", ".join(f"'{s.value}'" for s in LIVE_STATES)),
+        ),
+    )
     #we need 2 intents and 2 users to create a session.
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     intent_a_id: Mapped[int] = mapped_column(ForeignKey("intents.id", ondelete="CASCADE"), nullable=False, index=True)
@@ -33,9 +49,15 @@ class Session(Base):
     ends_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     max_duration_minutes: Mapped[int] = mapped_column(Integer, default=60, nullable=False)
     sos_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    # Rendezvous picked once at creation (schemas.session.MeetingPoint), so every view and worker agrees on it
+    meeting_point: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
     intent_a = relationship("Intent", foreign_keys=[intent_a_id])
     intent_b = relationship("Intent", foreign_keys=[intent_b_id])
     user_a = relationship("User", foreign_keys=[user_a_id])
     user_b = relationship("User", foreign_keys=[user_b_id])
+
+
+# gist__int_ops for the constraint above comes from the intarray extension (Postgres contrib)
+event.listen(Session.__table__, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS intarray"))
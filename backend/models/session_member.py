@@ -0,0 +1,20 @@
+"""Session membership: one row per party per session, the index behind GET /sessions/history.
+
+Keyed (user_id, created_at, session_id) so a user's history is one ordered index range, whichever side they
+were on and whether the session is still in sessions or has moved to sessions_archive. No foreign key to
+sessions for that reason; rows are written with the session (create_session) and removed with it.
+"""
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from backend.models.base import Base
+
+
+class SessionMember(Base):
+    __tablename__ = "session_members"
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    session_id: Mapped[int] = mapped_column(Integer, primary_key=True)
@@ -0,0 +1,11 @@
+"""Schemas for the geocoding proxy."""
+from pydantic import BaseModel
+
+
+class GeocodePlace(BaseModel):
+    """A named place: gazetteer stop/building or an upstream geocoder answer."""
+    name: str
+    lat: float
+    lng: float
+    source: str  # "stop", "building" or "upstream"
+    id: str | None = None
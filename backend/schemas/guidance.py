@@ -21,4 +21,6 @@ class WalkGuidanceResponse(BaseModel):
     distance_m: float
     duration_s: float
     steps: list[WalkStep]
+    # True when OSRM was unavailable and this is a straight-line estimate
+    approximate: bool = False
 
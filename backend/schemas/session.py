@@ -16,6 +16,17 @@ class RoutePoints(BaseModel):
     destination: RoutePoint
 
 
+class MeetingPoint(BaseModel):
+    """Suggested rendezvous for the pair and each side's estimated walk there (seconds)."""
+    lat: float
+    lng: float
+    kind: str  # "stop" or "midpoint"
+    stop_id: str | None = None
+    name: str | None = None
+    walk_s_a: float
+    walk_s_b: float
+
+
 class SessionCreate(BaseModel):
     """Request to create a session (link two intents). For matcher or manual testing."""
     intent_a_id: int
@@ -39,6 +50,26 @@ class SessionResponse(BaseModel):
     my_token: str | None = None
     route_a: RoutePoints | None = None
     route_b: RoutePoints | None = None
+    meeting_point: MeetingPoint | None = None
 
     class Config:
         from_attributes = True
+
+
+class SessionHistoryItem(BaseModel):
+    """A past or current session as its party sees it in their history (no tokens, no routes)."""
+    id: int
+    state: SessionState
+    my_side: str
+    partner_user_id: int
+    started_at: datetime | None
+    ends_at: datetime | None
+    sos_at: datetime | None = None
+    created_at: datetime
+    archived: bool = False
+
+
+class SessionHistoryPage(BaseModel):
+    """One page of history, newest first; pass next_cursor back as cursor for the next page (None at the end)."""
+    items: list[SessionHistoryItem]
+    next_cursor: str | None = None
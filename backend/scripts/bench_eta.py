@@ -0,0 +1,43 @@
+"""
+Benchmark ETA updates per second on one core (no Redis/DB; pure ETA service path).
+
+Usage (from project root):
+  python -m backend.scripts.bench_eta [--sessions 1000] [--updates 200000]
+"""
+import argparse
+import random
+import time
+
+from backend.services.eta import EtaService
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--updates", type=int, default=200000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    service = EtaService(max_sessions=args.sessions)
+    positions = {}
+    for sid in range(args.sessions):
+        base = (30.44 + rng.uniform(-0.01, 0.01), -84.29 + rng.uniform(-0.01, 0.01))
+        service.register(sid, base, {"a": (base[0] + 0.005, base[1]), "b": (base[0], base[1] + 0.005)})
+        positions[(sid, "a")] = positions[(sid, "b")] = base
+
+    ts = 0.0
+    start = time.perf_counter()
+    for i in range(args.updates):
+        sid = i % args.sessions
+        party = "a" if (i // args.sessions) % 2 == 0 else "b"
+        lat, lng = positions[(sid, party)]
+        lat, lng = lat + rng.uniform(-0.00002, 0.00006), lng + rng.uniform(-0.00002, 0.00006)
+        positions[(sid, party)] = (lat, lng)
+        ts += 0.005
+        service.update(sid, party, lat, lng, ts)
+    elapsed = time.perf_counter() - start
+    print(f"{args.updates} updates over {args.sessions} sessions in {elapsed:.2f}s: {args.updates / elapsed:,.0f} updates/s/core")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Benchmark geofence evaluations per second on one core (no Redis/DB; pure geofence service path).
+
+Usage (from project root):
+  python -m backend.scripts.bench_geofence [--sessions 1000] [--fixes 500000]
+"""
+import argparse
+import random
+import time
+
+from backend.services.geofence import GeofenceService
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--fixes", type=int, default=500000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    service = GeofenceService(max_sessions=args.sessions)
+    positions = {}
+    for sid in range(args.sessions):
+        base = (30.44 + rng.uniform(-0.01, 0.01), -84.29 + rng.uniform(-0.01, 0.01))
+        service.register(sid, (base[0] + 0.001, base[1]), {"a": (base[0] + 0.005, base[1]), "b": (base[0], base[1] + 0.005)})
+        positions[(sid, "a")] = positions[(sid, "b")] = base
+
+    # Precompute the walk so only evaluation is timed
+    fixes = []
+    for i in range(args.fixes):
+        sid = i % args.sessions
+        party = "a" if (i // args.sessions) % 2 == 0 else "b"
+        lat, lng = positions[(sid, party)]
+        lat, lng = lat + rng.uniform(-0.00002, 0.00006), lng + rng.uniform(-0.00002, 0.00006)
+        positions[(sid, party)] = (lat, lng)
+        fixes.append((sid, party, lat, lng))
+
+    events = 0
+    start = time.perf_counter()
+    for sid, party, lat, lng in fixes:
+        events += len(service.evaluate(sid, party, lat, lng))
+    elapsed = time.perf_counter() - start
+    print(
+        f"{args.fixes} fixes over {args.sessions} sessions in {elapsed:.2f}s: "
+        f"{args.fixes / elapsed:,.0f} fixes/s/core ({events} events)"
+    )
+
+
+if __name__ == "__main__":
+    main()
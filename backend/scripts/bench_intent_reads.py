@@ -0,0 +1,68 @@
+"""
+Compare read latency of intent coordinates via ST_Y/ST_X on the geometry vs the float columns, for the
+"my intents" and "route points by id" query shapes, against the configured database (needs some intents).
+
+Usage (from project root):
+  python -m backend.scripts.bench_intent_reads [--iterations 500]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import func, select
+
+from backend.database import engine
+from backend.models.intent import Intent
+
+
+def _shapes(user_id: int, ids: list[int]) -> dict:
+    geometry = [
+        func.ST_Y(Intent.origin),
+        func.ST_X(Intent.origin),
+        func.ST_Y(Intent.destination),
+        func.ST_X(Intent.destination),
+    ]
+    floats = [Intent.origin_lat, Intent.origin_lng, Intent.dest_lat, Intent.dest_lng]
+
+    def mine(cols):
+        return (
+            select(Intent.id, *cols, Intent.start_time, Intent.end_time, Intent.expires_at, Intent.created_at)
+            .where(Intent.user_id == user_id)
+            .order_by(Intent.created_at.desc())
+        )
+
+    def by_id(cols):
+        return select(Intent.id, *cols).where(Intent.id.in_(ids))
+
+    return {
+        "my intents (ST_Y/ST_X)": mine(geometry),
+        "my intents (floats)": mine(floats),
+        "route points (ST_Y/ST_X)": by_id(geometry),
+        "route points (floats)": by_id(floats),
+    }
+
+
+async def main(iterations: int) -> None:
+    engine.echo = False
+    async with engine.connect() as conn:
+        row = (await conn.execute(select(Intent.user_id, func.count()).group_by(Intent.user_id).order_by(func.count().desc()).limit(1))).first()
+        if row is None:
+            raise SystemExit("no intents to query")
+        ids = [r[0] for r in await conn.execute(select(Intent.id).order_by(Intent.id.desc()).limit(20))]
+        for name, q in _shapes(row[0], ids).items():
+            await conn.execute(q)
+            samples = []
+            for _ in range(iterations):
+                start = time.perf_counter()
+                (await conn.execute(q)).all()
+                samples.append((time.perf_counter() - start) * 1000)
+            samples.sort()
+            print(f"{name:<28} p50 {statistics.median(samples):.3f} ms   p95 {samples[int(len(samples) * 0.95)]:.3f} ms")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=500)
+    asyncio.run(main(parser.parse_args().iterations))
@@ -0,0 +1,79 @@
+"""
+Benchmark location frame parsing (fixes/s) for JSON text frames vs binary lmc.loc.v1 frames, and optionally
+store throughput for per-fix writes vs one batched write per frame against a real Redis.
+
+Usage (from project root):
+  python -m backend.scripts.bench_location_frames [--fixes 200000] [--batch 1 10 50]
+  python -m backend.scripts.bench_location_frames --redis-url redis://localhost:6379/0 [--frames 2000]
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import redis.asyncio as aioredis
+
+from backend.services.location_codec import decode_fixes, encode_fixes
+from backend.services.location_store import set_location, set_locations
+
+
+def _fixes(n: int) -> list[tuple[float, float, float]]:
+    rng = random.Random(1)
+    return [(30.44 + rng.random() / 100, -84.29 + rng.random() / 100, 1700000000 + i) for i in range(n)]
+
+
+def _bench_parse(fixes: list, batch: int) -> tuple[float, float]:
+    texts = [json.dumps({"lat": lat, "lng": lng}) for lat, lng, _ in fixes]
+    start = time.perf_counter()
+    for text in texts:
+        obj = json.loads(text)
+        float(obj.get("lat", 0)), float(obj.get("lng", 0))
+    json_rate = len(texts) / (time.perf_counter() - start)
+
+    frames = [encode_fixes(fixes[i:i + batch]) for i in range(0, len(fixes), batch)]
+    start = time.perf_counter()
+    for frame in frames:
+        decode_fixes(frame)
+    binary_rate = len(fixes) / (time.perf_counter() - start)
+    return json_rate, binary_rate
+
+
+async def _bench_store(redis_url: str, frames: int, batch: int) -> tuple[float, float]:
+    redis = aioredis.from_url(redis_url)
+    fixes = _fixes(frames * batch)
+    try:
+        start = time.perf_counter()
+        for lat, lng, _ in fixes:
+            await set_location(redis, 990001, "a", lat, lng)
+        per_fix = len(fixes) / (time.perf_counter() - start)
+        start = time.perf_counter()
+        for i in range(0, len(fixes), batch):
+            await set_locations(redis, 990002, "a", fixes[i:i + batch])
+        batched = len(fixes) / (time.perf_counter() - start)
+        await redis.delete("session:990001:loc", "session:990002:loc")
+    finally:
+        await redis.aclose()
+    return per_fix, batched
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixes", type=int, default=200000)
+    parser.add_argument("--batch", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--redis-url", default=None, help="also benchmark store throughput against this Redis")
+    parser.add_argument("--frames", type=int, default=2000)
+    args = parser.parse_args()
+
+    fixes = _fixes(args.fixes)
+    for batch in args.batch:
+        json_rate, binary_rate = _bench_parse(fixes, batch)
+        print(f"parse batch={batch:<4} json {json_rate:>12,.0f} fixes/s   binary {binary_rate:>12,.0f} fixes/s")
+    if args.redis_url:
+        for batch in args.batch:
+            per_fix, batched = asyncio.run(_bench_store(args.redis_url, args.frames, batch))
+            print(f"store batch={batch:<4} per-fix {per_fix:>10,.0f} fixes/s   batched {batched:>10,.0f} fixes/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Benchmark location writes (fixes/s) against a real Redis: old GET+SETEX JSON blob vs current HSET+EXPIRE pipeline.
+
+Usage (from project root, Redis running e.g. via docker-compose):
+  python -m backend.scripts.bench_location_store [--redis-url redis://localhost:6379/0] [--fixes 20000] [--concurrency 50]
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import redis.asyncio as aioredis
+
+from backend.config import settings
+from backend.services.location_store import get_locations_many, set_location
+
+
+async def _set_location_before(redis, session_id: int, party: str, lat: float, lng: float) -> None:
+    """Previous implementation: two round-trips and a read-modify-write."""
+    key = f"bench:session:{session_id}:locations"
+    raw = await redis.get(key)
+    data = json.loads(raw) if raw else {}
+    data[party] = {"lat": lat, "lng": lng}
+    await redis.setex(key, settings.SESSION_LOCATION_TTL_SECONDS, json.dumps(data))
+
+
+async def _run(write, redis, fixes: int, concurrency: int, sessions: int) -> float:
+    rng = random.Random(1)
+    per_worker = fixes // concurrency
+
+    async def worker(w: int) -> None:
+        for i in range(per_worker):
+            sid = 900000 + (w * per_worker + i) % sessions
+            await write(redis, sid, "a" if i % 2 else "b", 30.44 + rng.random() / 100, -84.29 + rng.random() / 100)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker(w) for w in range(concurrency)])
+    return per_worker * concurrency / (time.perf_counter() - start)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--redis-url", default=settings.REDIS_URL)
+    parser.add_argument("--fixes", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--sessions", type=int, default=1000)
+    args = parser.parse_args()
+    redis = aioredis.from_url(args.redis_url)
+    try:
+        before = await _run(_set_location_before, redis, args.fixes, args.concurrency, args.sessions)
+        after = await _run(set_location, redis, args.fixes, args.concurrency, args.sessions)
+        start = time.perf_counter()
+        await get_locations_many(redis, range(900000, 900000 + args.sessions))
+        bulk_ms = (time.perf_counter() - start) * 1000
+        print(f"before (GET+SETEX):        {before:,.0f} fixes/s")
+        print(f"after  (HSET+EXPIRE pipe): {after:,.0f} fixes/s")
+        print(f"bulk read of {args.sessions} sessions: {bulk_ms:.1f} ms")
+    finally:
+        await redis.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,55 @@
+"""
+Move an existing intents table to float coordinate columns (new databases get this from create_all):
+add origin_lat/origin_lng/dest_lat/dest_lng, backfill them from the geometry, then replace origin/destination
+with columns generated from the floats and create the spatial and covering indexes. Idempotent.
+
+Usage (from project root):
+  python -m backend.scripts.migrate_intent_coords
+"""
+import asyncio
+
+from sqlalchemy import text
+from sqlalchemy.schema import CreateIndex
+
+from backend.database import engine
+from backend.models.intent import COORD_COLUMNS, DESTINATION_POINT_SQL, ORIGIN_POINT_SQL, Intent
+
+BACKFILL = text(
+    """
+    UPDATE intents
+    SET origin_lat = ST_Y(origin), origin_lng = ST_X(origin), dest_lat = ST_Y(destination), dest_lng = ST_X(destination)
+    WHERE origin_lat IS NULL
+    """
+)
+
+
+async def main() -> None:
+    async with engine.begin() as conn:
+        for col in COORD_COLUMNS:
+            await conn.execute(text(f"ALTER TABLE intents ADD COLUMN IF NOT EXISTS {col} double precision"))
+        generated = await conn.execute(
+            text("SELECT attgenerated FROM pg_attribute WHERE attrelid = 'intents'::regclass AND attname = 'origin'")
+        )
+        if generated.scalar() != "s":
+            backfilled = await conn.execute(BACKFILL)
+            print(f"backfilled {backfilled.rowcount} intents")
+            for col in COORD_COLUMNS:
+                await conn.execute(text(f"ALTER TABLE intents ALTER COLUMN {col} SET NOT NULL"))
+            # Dropping the columns drops their GiST indexes too; they are recreated below
+            await conn.execute(text("ALTER TABLE intents DROP COLUMN origin, DROP COLUMN destination"))
+            await conn.execute(
+                text(
+                    "ALTER TABLE intents "
+                    f"ADD COLUMN origin geometry(POINT,4326) GENERATED ALWAYS AS ({ORIGIN_POINT_SQL}) STORED, "
+                    f"ADD COLUMN destination geometry(POINT,4326) GENERATED ALWAYS AS ({DESTINATION_POINT_SQL}) STORED"
+                )
+            )
+            print("origin/destination now generated from the float columns")
+        for index in Intent.__table__.indexes:
+            await conn.execute(CreateIndex(index, if_not_exists=True))
+        await conn.execute(text("ANALYZE intents"))
+    print("indexes in place")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
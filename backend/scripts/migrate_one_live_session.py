@@ -0,0 +1,56 @@
+"""
+Add the sessions_one_live_per_user exclusion constraint to an existing database (new databases get it from
+create_all). Sessions that already break the rule are listed; with --abort-older, all but each user's newest
+live session are set to ABORTED first.
+
+Usage (from project root):
+  python -m backend.scripts.migrate_one_live_session [--abort-older]
+"""
+import argparse
+import asyncio
+
+from sqlalchemy import text
+from sqlalchemy.schema import AddConstraint
+
+from backend.database import engine
+from backend.models.session import Session
+
+CONSTRAINT = "sessions_one_live_per_user"
+
+# Live sessions that share a party with a newer live session
+CONFLICTS = text(
+    """
+    SELECT older.id FROM sessions older
+    JOIN sessions newer
+      ON newer.id > older.id
+     AND ARRAY[older.user_a_id, older.user_b_id] && ARRAY[newer.user_a_id, newer.user_b_id]
+    WHERE older.state IN ('REQUESTED', 'ACCEPTED', 'ACTIVE') AND newer.state IN ('REQUESTED', 'ACCEPTED', 'ACTIVE')
+    GROUP BY older.id ORDER BY older.id
+    """
+)
+
+
+async def main(abort_older: bool) -> None:
+    constraint = next(c for c in Session.__table__.constraints if c.name == CONSTRAINT)
+    async with engine.begin() as conn:
+        exists = await conn.execute(text("SELECT 1 FROM pg_constraint WHERE conname = :n"), {"n": CONSTRAINT})
+        if exists.scalar() is not None:
+            print(f"{CONSTRAINT} already present")
+            return
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS intarray"))
+        conflicts = [row[0] for row in await conn.execute(CONFLICTS)]
+        if conflicts:
+            if not abort_older:
+                raise SystemExit(f"{len(conflicts)} live sessions overlap a newer one: {conflicts}; rerun with --abort-older")
+            await conn.execute(
+                text("UPDATE sessions SET state = 'ABORTED' WHERE id = ANY(:ids)"), {"ids": conflicts}
+            )
+            print(f"aborted {len(conflicts)} older overlapping sessions")
+        await conn.execute(AddConstraint(constraint))
+    print(f"added {CONSTRAINT}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--abort-older", action="store_true")
+    asyncio.run(main(parser.parse_args().abort_older))
@@ -0,0 +1,34 @@
+"""
+Drop the ratings -> sessions foreign key from an existing database (new databases are created without it), so
+the archive job can move rated sessions to sessions_archive while their ratings stay in ratings.
+
+Usage (from project root):
+  python -m backend.scripts.migrate_rating_session_fk
+"""
+import asyncio
+
+from sqlalchemy import text
+
+from backend.database import engine
+
+FOREIGN_KEYS = text(
+    """
+    SELECT conname FROM pg_constraint
+    WHERE contype = 'f' AND conrelid = 'ratings'::regclass AND confrelid = 'sessions'::regclass
+    """
+)
+
+
+async def main() -> None:
+    async with engine.begin() as conn:
+        names = [row[0] for row in await conn.execute(FOREIGN_KEYS)]
+        if not names:
+            print("ratings has no foreign key to sessions")
+            return
+        for name in names:
+            await conn.execute(text(f'ALTER TABLE ratings DROP CONSTRAINT "{name}"'))
+            print(f"dropped {name}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
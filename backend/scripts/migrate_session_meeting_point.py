@@ -0,0 +1,44 @@
+"""
+Add the meeting_point column to sessions and sessions_archive in an existing database (new databases get it
+from create_all), and store a meeting point on live sessions created before it existed. Idempotent.
+
+Usage (from project root):
+  python -m backend.scripts.migrate_session_meeting_point
+"""
+import asyncio
+
+from sqlalchemy import select, text, update
+
+from backend.database import async_session, engine
+from backend.models.session import LIVE_STATES, Session
+from backend.services.session_events import meeting_point_for
+from backend.services.session_routes import route_points_by_intent
+
+
+async def main() -> None:
+    async with engine.begin() as conn:
+        for table in ("sessions", "sessions_archive"):
+            exists = (await conn.execute(text("SELECT to_regclass(:t)"), {"t": table})).scalar()
+            if exists is not None:
+                await conn.execute(text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS meeting_point JSONB"))
+    async with async_session() as db:
+        sessions = (
+            await db.execute(
+                select(Session.id, Session.intent_a_id, Session.intent_b_id).where(
+                    Session.state.in_(LIVE_STATES), Session.meeting_point.is_(None)
+                )
+            )
+        ).all()
+        routes = await route_points_by_intent(db, {i for s in sessions for i in (s.intent_a_id, s.intent_b_id)})
+        filled = 0
+        for s in sessions:
+            mp = meeting_point_for(routes.get(s.intent_a_id), routes.get(s.intent_b_id))
+            if mp is not None:
+                await db.execute(update(Session).where(Session.id == s.id).values(meeting_point=mp.model_dump()))
+                filled += 1
+        await db.commit()
+    print(f"meeting point stored on {filled} live sessions")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,37 @@
+"""
+Backfill session_members (the index behind GET /api/sessions/history) from sessions and sessions_archive.
+New databases get the table from create_all and rows from create_session; this only fills in sessions
+created before the table existed. Idempotent.
+
+Usage (from project root):
+  python -m backend.scripts.migrate_session_members
+"""
+import asyncio
+
+from sqlalchemy import text
+
+from backend.database import engine
+from backend.models.session_member import SessionMember
+
+BACKFILL = """
+    INSERT INTO session_members (user_id, created_at, session_id)
+    SELECT user_a_id, created_at, id FROM {table}
+    UNION
+    SELECT user_b_id, created_at, id FROM {table}
+    ON CONFLICT DO NOTHING
+"""
+
+
+async def main() -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(SessionMember.__table__.create, checkfirst=True)
+        for table in ("sessions", "sessions_archive"):
+            exists = (await conn.execute(text("SELECT to_regclass(:t)"), {"t": table})).scalar()
+            if exists is None:
+                continue
+            result = await conn.execute(text(BACKFILL.format(table=table)))
+            print(f"{table}: {result.rowcount} memberships added")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
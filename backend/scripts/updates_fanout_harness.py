@@ -0,0 +1,103 @@
+"""
+Local multi-process harness for /ws/updates fanout through Redis (requires a running Redis).
+
+Starts N worker processes, each with its own UpdatesConnectionManager and fake sockets for a slice of users,
+then publishes one notification per user from the parent process. Checks every user received exactly its
+own messages once, and reports how many shard channels each worker had to subscribe to.
+
+Usage (from project root):
+  python -m backend.scripts.updates_fanout_harness [--workers 4] [--users 200] [--shards 64]
+"""
+import argparse
+import asyncio
+import multiprocessing as mp
+import sys
+
+import redis.asyncio as aioredis
+
+from backend.config import settings
+from backend.services.pubsub import RedisPubSubHub
+from backend.services.ws_updates import UpdatesConnectionManager
+
+
+class FakeSocket:
+    def __init__(self) -> None:
+        self.received: list[str] = []
+
+    async def send_text(self, text: str) -> None:
+        self.received.append(text)
+
+    async def close(self, code: int = 1000) -> None:
+        pass
+
+
+async def _worker(index: int, args, ready, go, results) -> None:
+    redis = aioredis.from_url(args.redis_url)
+    hub = RedisPubSubHub(f"harness_{index}")
+    await hub.start(redis)
+    manager = UpdatesConnectionManager(hub=hub, shards=args.shards)
+    sockets = {}
+    for uid in range(index, args.users, args.workers):
+        sockets[uid] = FakeSocket()
+        await manager.connect(uid, sockets[uid])
+    await asyncio.sleep(0.5)  # let SUBSCRIBE reach Redis
+    ready.set()
+    await asyncio.get_running_loop().run_in_executor(None, go.wait)
+    await asyncio.sleep(args.settle)
+    results.put((index, len(manager._shard_users), {uid: s.received for uid, s in sockets.items()}))
+    await hub.stop()
+    await redis.close()
+
+
+def _worker_main(index, args, ready, go, results) -> None:
+    asyncio.run(_worker(index, args, ready, go, results))
+
+
+async def _publish(args) -> None:
+    redis = aioredis.from_url(args.redis_url)
+    hub = RedisPubSubHub("harness_publisher")
+    await hub.start(redis)
+    manager = UpdatesConnectionManager(hub=hub, shards=args.shards)
+    for uid in range(args.users):
+        await manager.notify_user(uid, {"type": "sessions", "for": uid})
+    await hub.stop()
+    await redis.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--redis-url", default=settings.REDIS_URL)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--shards", type=int, default=64)
+    parser.add_argument("--settle", type=float, default=1.0)
+    args = parser.parse_args()
+
+    ctx = mp.get_context("spawn")
+    go = ctx.Event()
+    results = ctx.Queue()
+    readies = [ctx.Event() for _ in range(args.workers)]
+    procs = [ctx.Process(target=_worker_main, args=(i, args, readies[i], go, results)) for i in range(args.workers)]
+    for p in procs:
+        p.start()
+    for r in readies:
+        r.wait(timeout=30)
+    asyncio.run(_publish(args))
+    go.set()
+
+    failures = 0
+    for _ in procs:
+        index, shard_count, received = results.get(timeout=60)
+        for uid, frames in received.items():
+            if len(frames) != 1 or f'"for": {uid}' not in frames[0]:
+                failures += 1
+                print(f"worker {index}: user {uid} got {frames}")
+        print(f"worker {index}: {len(received)} users, subscribed to {shard_count}/{args.shards} shards")
+    for p in procs:
+        p.join()
+    print("OK" if failures == 0 else f"FAILED: {failures} users with wrong deliveries")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Session auto-end deadlines in a Redis sorted set (member = session id, score = deadline as unix seconds).
+
+Scheduled from sessions.ends_at when a session becomes ACTIVE, removed when it ends. Workers claim due entries with ZREM, so each
+expiry is handled by exactly one of them even if several poll at once.
+"""
+from typing import Any
+
+from sqlalchemy import literal_column
+from sqlalchemy.sql import ColumnElement
+
+from backend.models.session import Session
+
+DEADLINES_KEY = "sessions:deadlines"
+
+
+def planned_end(started_at: ColumnElement) -> ColumnElement:
+    """SQL for started_at + max_duration_minutes (what sessions.ends_at is set to on activation)."""
+    return started_at + Session.max_duration_minutes * literal_column("interval '1 minute'")
+
+
+async def schedule(redis: Any, session_id: int, deadline: float) -> None:
+    await redis.zadd(DEADLINES_KEY, {str(session_id): deadline})
+
+
+async def schedule_many(redis: Any, deadlines: dict[int, float]) -> None:
+    if deadlines:
+        await redis.zadd(DEADLINES_KEY, {str(sid): ts for sid, ts in deadlines.items()})
+
+
+async def cancel(redis: Any, session_id: int) -> None:
+    await redis.zrem(DEADLINES_KEY, str(session_id))
+
+
+async def claim_due(redis: Any, now: float, limit: int = 500) -> list[int]:
+    """Remove and return up to limit session ids whose deadline has passed (only the ids this caller removed)."""
+    due = await redis.zrangebyscore(DEADLINES_KEY, "-inf", now, start=0, num=limit)
+    if not due:
+        return []
+    async with redis.pipeline(transaction=False) as pipe:
+        for member in due:
+            pipe.zrem(DEADLINES_KEY, member)
+        removed = await pipe.execute()
+    return [int(member) for member, ok in zip(due, removed) if ok]
@@ -0,0 +1,126 @@
+"""Live ETA for ACTIVE sessions, updated incrementally from each location fix.
+
+Each party keeps a short trail of fixes plus an exponentially smoothed speed and last heading; a new fix
+only touches its own party (one segment, one cache lookup), never the whole trail. Remaining distance comes
+from the walk_times OSRM cache when the cell pair is known, else straight line x WALK_DETOUR_FACTOR.
+Target is the meeting point until the party has been within ETA_ARRIVAL_RADIUS_M of it, then their destination.
+"""
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+
+from backend.config import settings
+from backend.services import metrics
+from backend.services.geo import bearing_deg, haversine_m
+from backend.services.walk_times import cached
+
+# Below this smoothed speed (m/s) the party is treated as standing still and walking speed is assumed
+MOVING_SPEED_MPS = 0.3
+# Ignore GPS jitter shorter than this when updating heading
+MIN_HEADING_SEGMENT_M = 3.0
+
+TARGET_MEETING_POINT = "meeting_point"
+TARGET_DESTINATION = "destination"
+
+
+@dataclass
+class PartyTrack:
+    meeting_point: tuple[float, float] | None
+    destination: tuple[float, float] | None
+    trail: deque = field(default_factory=lambda: deque(maxlen=settings.ETA_TRAIL_LENGTH))
+    speed_mps: float | None = None
+    heading_deg: float | None = None
+    reached_meeting_point: bool = False
+
+    def update(self, lat: float, lng: float, ts: float) -> dict:
+        """Fold one fix into the track and return this party's ETA payload."""
+        if self.trail:
+            p_lat, p_lng, p_ts = self.trail[-1]
+            seg_m = haversine_m(p_lat, p_lng, lat, lng)
+            dt = ts - p_ts
+            if dt > 0:
+                inst = seg_m / dt
+                alpha = settings.ETA_SPEED_ALPHA
+                self.speed_mps = inst if self.speed_mps is None else alpha * inst + (1 - alpha) * self.speed_mps
+            if seg_m >= MIN_HEADING_SEGMENT_M:
+                self.heading_deg = bearing_deg(p_lat, p_lng, lat, lng)
+        self.trail.append((lat, lng, ts))
+        return self._estimate(lat, lng)
+
+    def _target(self, lat: float, lng: float) -> tuple[str, tuple[float, float]] | None:
+        if self.meeting_point and not self.reached_meeting_point:
+            if haversine_m(lat, lng, *self.meeting_point) <= settings.ETA_ARRIVAL_RADIUS_M:
+                self.reached_meeting_point = True
+            else:
+                return TARGET_MEETING_POINT, self.meeting_point
+        if self.destination:
+            return TARGET_DESTINATION, self.destination
+        return None
+
+    def _estimate(self, lat: float, lng: float) -> dict:
+        out = {
+            "lat": lat,
+            "lng": lng,
+            "speed_mps": round(self.speed_mps, 2) if self.speed_mps is not None else None,
+            "heading_deg": round(self.heading_deg, 1) if self.heading_deg is not None else None,
+        }
+        target = self._target(lat, lng)
+        if target is None:
+            return out
+        name, point = target
+        walk = cached((lat, lng), point)
+        if walk is not None:
+            distance_m = walk[0]
+        else:
+            distance_m = haversine_m(lat, lng, *point) * settings.WALK_DETOUR_FACTOR
+        speed = self.speed_mps if self.speed_mps is not None and self.speed_mps >= MOVING_SPEED_MPS else settings.WALKING_SPEED_MPS
+        out.update(target=name, distance_m=round(distance_m, 1), eta_s=round(distance_m / speed, 1))
+        return out
+
+
+@dataclass
+class SessionEta:
+    tracks: dict[str, PartyTrack]
+
+
+class EtaService:
+    """Per-process ETA state for sessions with a connected location socket (bounded, least-recently-updated evicted)."""
+
+    def __init__(self, max_sessions: int) -> None:
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[int, SessionEta]" = OrderedDict()
+
+    def register(
+        self,
+        session_id: int,
+        meeting_point: tuple[float, float] | None,
+        destinations: dict[str, tuple[float, float] | None],
+    ) -> None:
+        """Set targets for a session (idempotent: existing trails are kept)."""
+        if session_id in self._sessions:
+            self._sessions.move_to_end(session_id)
+            return
+        self._sessions[session_id] = SessionEta(
+            tracks={party: PartyTrack(meeting_point, dest) for party, dest in destinations.items()}
+        )
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+    def update(self, session_id: int, party: str, lat: float, lng: float, ts: float | None = None) -> dict | None:
+        """
+        Apply one fix; return this party's ETA payload, or None if not registered. The other party's track may
+        live on another worker: location_store merges both sides through Redis.
+        """
+        entry = self._sessions.get(session_id)
+        if entry is None or party not in entry.tracks:
+            return None
+        self._sessions.move_to_end(session_id)
+        metrics.incr("eta.updates")
+        return entry.tracks[party].update(lat, lng, ts if ts is not None else time.time())
+
+    def drop(self, session_id: int) -> None:
+        self._sessions.pop(session_id, None)
+
+
+eta_service = EtaService(max_sessions=settings.ETA_MAX_SESSIONS)
+metrics.register_gauge("eta.sessions", lambda: len(eta_service._sessions))
@@ -0,0 +1,29 @@
+"""Small WGS84 helpers shared by services (distances, bearings)."""
+import math
+
+EARTH_RADIUS_M = 6371000.0
+
+_COMPASS = ("north", "northeast", "east", "southeast", "south", "southwest", "west", "northwest")
+
+
+def haversine_m(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance in meters between two WGS84 points."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = math.radians(lat2 - lat1)
+    dlam = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlam / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+
+def bearing_deg(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Initial bearing from point 1 to point 2, degrees clockwise from north (0-360)."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dlam = math.radians(lng2 - lng1)
+    x = math.sin(dlam) * math.cos(phi2)
+    y = math.cos(phi1) * math.sin(phi2) - math.sin(phi1) * math.cos(phi2) * math.cos(dlam)
+    return (math.degrees(math.atan2(x, y)) + 360.0) % 360.0
+
+
+def compass_direction(bearing: float) -> str:
+    """Map a bearing in degrees to one of 8 compass words ("north", "southeast", ...)."""
+    return _COMPASS[int(((bearing % 360.0) + 22.5) // 45) % 8]
@@ -0,0 +1,251 @@
+"""Geocoding proxy: local campus gazetteer (stops + buildings) with a cached, pluggable upstream.
+
+Forward search is a prefix match on any word of a place name (bisect over a sorted key list). Anything
+the gazetteer cannot answer goes to the upstream geocoder through an in-process LRU, then Redis, and
+concurrent identical misses share one upstream call.
+
+Buildings are read from backend/data/campus_buildings.json if present: [{id, name, lat, lng}, ...].
+"""
+from __future__ import annotations
+
+import asyncio
+import bisect
+import json
+import re
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Protocol
+
+import httpx
+from redis.exceptions import RedisError
+
+from backend.config import settings
+from backend.redis_client import get_redis
+from backend.services import metrics
+from backend.services.geo import haversine_m
+from backend.services.stops_loader import load_fsu_stops
+
+_WORD = re.compile(r"\w+")
+
+
+def normalize(text: str) -> str:
+    return " ".join(_WORD.findall(text.lower()))
+
+
+class Gazetteer:
+    """In-memory place list with word-prefix search."""
+
+    def __init__(self, places: list[dict[str, Any]]) -> None:
+        self.places = places
+        keys = []
+        for i, p in enumerate(places):
+            words = normalize(p["name"]).split(" ")
+            for w in range(len(words)):
+                keys.append((" ".join(words[w:]), i))
+        keys.sort()
+        self._keys = [k for k, _ in keys]
+        self._idx = [i for _, i in keys]
+
+    def search(self, query: str, limit: int) -> list[dict[str, Any]]:
+        q = normalize(query)
+        if not q:
+            return []
+        out: list[dict[str, Any]] = []
+        seen: set[int] = set()
+        pos = bisect.bisect_left(self._keys, q)
+        while pos < len(self._keys) and self._keys[pos].startswith(q) and len(out) < limit:
+            i = self._idx[pos]
+            if i not in seen:
+                seen.add(i)
+                out.append(self.places[i])
+            pos += 1
+        return out
+
+    def nearest(self, lat: float, lng: float, radius_m: float) -> dict[str, Any] | None:
+        best, best_d = None, radius_m
+        for p in self.places:
+            d = haversine_m(lat, lng, p["lat"], p["lng"])
+            if d <= best_d:
+                best, best_d = p, d
+        return best
+
+
+def _buildings_path() -> Path:
+    return Path(__file__).resolve().parent.parent / "data" / "campus_buildings.json"
+
+
+_gazetteer: Gazetteer | None = None
+
+
+def get_gazetteer() -> Gazetteer:
+    """Buildings then stops, built once per process."""
+    global _gazetteer
+    if _gazetteer is None:
+        places = []
+        path = _buildings_path()
+        if path.exists():
+            for b in json.loads(path.read_text(encoding="utf-8")):
+                places.append({"id": str(b.get("id", "")) or None, "name": b["name"], "lat": float(b["lat"]), "lng": float(b["lng"]), "source": "building"})
+        for s in load_fsu_stops():
+            places.append({"id": str(s["id"]), "name": s["name"], "lat": float(s["lat"]), "lng": float(s["lng"]), "source": "stop"})
+        _gazetteer = Gazetteer(places)
+    return _gazetteer
+
+
+class GeocoderUpstream(Protocol):
+    """External geocoder. Results are lists of {name, lat, lng} / a single dict or None."""
+
+    async def search(self, query: str, limit: int) -> list[dict[str, Any]]: ...
+
+    async def reverse(self, lat: float, lng: float) -> dict[str, Any] | None: ...
+
+
+class NominatimUpstream:
+    """OpenStreetMap Nominatim (public instance is rate-limited to ~1 req/s)."""
+
+    def __init__(self, base_url: str, timeout_s: float) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.timeout_s = timeout_s
+        self._headers = {"Accept": "application/json", "Accept-Language": "en", "User-Agent": "LastMile-Connect/1.0"}
+
+    async def _get(self, path: str, params: dict[str, Any]) -> Any:
+        async with httpx.AsyncClient(timeout=self.timeout_s) as client:
+            r = await client.get(f"{self.base_url}/{path}", params={**params, "format": "json"}, headers=self._headers)
+            r.raise_for_status()
+            return r.json()
+
+    async def search(self, query: str, limit: int) -> list[dict[str, Any]]:
+        data = await self._get("search", {"q": query, "limit": limit})
+        return [{"name": d["display_name"], "lat": float(d["lat"]), "lng": float(d["lon"])} for d in data or []]
+
+    async def reverse(self, lat: float, lng: float) -> dict[str, Any] | None:
+        data = await self._get("reverse", {"lat": lat, "lon": lng})
+        if not data or "display_name" not in data:
+            return None
+        return {"name": data["display_name"], "lat": float(data.get("lat", lat)), "lng": float(data.get("lon", lng))}
+
+
+class StubUpstream:
+    """Offline stand-in: no forward results; reverse labels the coordinate."""
+
+    async def search(self, query: str, limit: int) -> list[dict[str, Any]]:
+        return []
+
+    async def reverse(self, lat: float, lng: float) -> dict[str, Any] | None:
+        return {"name": f"{lat:.4f}, {lng:.4f}", "lat": lat, "lng": lng}
+
+
+def _default_upstream() -> GeocoderUpstream:
+    if settings.GEOCODER_UPSTREAM == "stub":
+        return StubUpstream()
+    return NominatimUpstream(settings.NOMINATIM_BASE_URL, settings.GEOCODER_TIMEOUT_SECONDS)
+
+
+_upstream: GeocoderUpstream | None = None
+
+
+def set_upstream(upstream: GeocoderUpstream | None) -> None:
+    """Swap the upstream geocoder (None restores the configured default)."""
+    global _upstream
+    _upstream = upstream
+
+
+def get_upstream() -> GeocoderUpstream:
+    global _upstream
+    if _upstream is None:
+        _upstream = _default_upstream()
+    return _upstream
+
+
+_lru: "OrderedDict[str, Any]" = OrderedDict()
+_inflight: dict[str, asyncio.Task] = {}
+
+metrics.register_gauge("geocode.lru_size", lambda: len(_lru))
+metrics.register_gauge("geocode.upstream_rate", lambda: metrics.ratio("geocode.upstream_calls", "geocode.upstream_lookups"))
+
+
+def _lru_put(key: str, value: Any) -> None:
+    _lru[key] = value
+    _lru.move_to_end(key)
+    while len(_lru) > settings.GEOCODE_LRU_MAX_ENTRIES:
+        _lru.popitem(last=False)
+
+
+async def _cached_upstream(key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+    """
+    LRU -> Redis -> upstream, with concurrent misses for the same key sharing one upstream call. The call runs
+    in its own task, so a caller that goes away (cancelled request) does not cancel it for the others.
+    """
+    metrics.incr("geocode.upstream_lookups")
+    if key in _lru:
+        _lru.move_to_end(key)
+        metrics.incr("geocode.lru_hits")
+        return _lru[key]
+    task = _inflight.get(key)
+    if task is not None:
+        metrics.incr("geocode.coalesced")
+    else:
+        task = asyncio.create_task(_fetch_into_lru(key, fetch))
+        _inflight[key] = task
+        task.add_done_callback(lambda t: _inflight_done(key, t))
+    return await asyncio.shield(task)
+
+
+async def _fetch_into_lru(key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+    value = await _redis_or_fetch(key, fetch)
+    _lru_put(key, value)
+    return value
+
+
+def _inflight_done(key: str, task: asyncio.Task) -> None:
+    if _inflight.get(key) is task:
+        del _inflight[key]
+    if not task.cancelled():
+        task.exception()  # mark retrieved when every caller went away
+
+
+async def _redis_or_fetch(key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+    redis_key = f"geocode:{key}"
+    redis = None
+    try:
+        redis = await get_redis()
+        raw = await redis.get(redis_key)
+        if raw is not None:
+            metrics.incr("geocode.redis_hits")
+            return json.loads(raw)
+    except (RuntimeError, RedisError):
+        redis = None
+    metrics.incr("geocode.upstream_calls")
+    value = await fetch()
+    if redis is not None:
+        try:
+            await redis.setex(redis_key, settings.GEOCODE_CACHE_TTL_SECONDS, json.dumps(value))
+        except RedisError:
+            pass
+    return value
+
+
+async def search(query: str, limit: int = 10) -> list[dict[str, Any]]:
+    """Gazetteer prefix matches; the upstream is only asked when the gazetteer has none."""
+    local = get_gazetteer().search(query, limit)
+    if local:
+        metrics.incr("geocode.local_hits")
+        return local
+    q = normalize(query)
+    if len(q) < 3:
+        return []
+    upstream = get_upstream()
+    found = await _cached_upstream(f"search:{limit}:{q}", lambda: upstream.search(q, limit))
+    return [{**p, "source": "upstream", "id": None} for p in found]
+
+
+async def reverse(lat: float, lng: float) -> dict[str, Any] | None:
+    """Nearest gazetteer place within GEOCODE_LOCAL_RADIUS_M, else the upstream answer for the ~10 m cell."""
+    local = get_gazetteer().nearest(lat, lng, settings.GEOCODE_LOCAL_RADIUS_M)
+    if local is not None:
+        metrics.incr("geocode.local_hits")
+        return local
+    cell_lat, cell_lng = round(lat, 4), round(lng, 4)
+    upstream = get_upstream()
+    found = await _cached_upstream(f"reverse:{cell_lat}:{cell_lng}", lambda: upstream.reverse(cell_lat, cell_lng))
+    return {**found, "source": "upstream", "id": None} if found else None
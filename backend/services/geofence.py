@@ -0,0 +1,146 @@
+"""Geofences for ACTIVE sessions, evaluated on every location fix.
+
+Each session gets circular fences precomputed at registration: the shared meeting point and each party's
+destination. A fence stores its centre in a local planar frame (metres per degree at its latitude) so a fix
+is tested with a few multiplications, no trig; a party only ever checks its own two fences, so evaluation is
+O(1) per fix. Leaving uses a wider radius than entering (hysteresis) so GPS jitter at the edge does not flap.
+
+Events per party: "arrived" / "departed" for a fence, and "diverging" when the distance to the current
+target (meeting point until reached, then destination) grows GEOFENCE_DIVERGE_M past its best so far.
+"""
+import math
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from backend.config import settings
+from backend.services import metrics
+from backend.services.geo import EARTH_RADIUS_M
+
+FENCE_MEETING_POINT = "meeting_point"
+FENCE_DESTINATION = "destination"
+
+_M_PER_DEG = math.pi * EARTH_RADIUS_M / 180.0
+
+
+class Fence:
+    __slots__ = ("kind", "lat", "lng", "_kx", "enter2", "exit2")
+
+    def __init__(self, kind: str, lat: float, lng: float, radius_m: float) -> None:
+        self.kind = kind
+        self.lat = lat
+        self.lng = lng
+        self._kx = _M_PER_DEG * math.cos(math.radians(lat))
+        self.enter2 = radius_m * radius_m
+        exit_m = radius_m * settings.GEOFENCE_EXIT_FACTOR
+        self.exit2 = exit_m * exit_m
+
+    def dist2(self, lat: float, lng: float) -> float:
+        """Squared distance in metres (equirectangular; exact enough at fence scale)."""
+        dx = (lng - self.lng) * self._kx
+        dy = (lat - self.lat) * _M_PER_DEG
+        return dx * dx + dy * dy
+
+
+@dataclass
+class PartyFences:
+    fences: list[Fence]
+    inside: set[str] = field(default_factory=set)
+    reached_meeting_point: bool = False
+    target: str | None = None
+    best_m: float | None = None
+    diverging: bool = False
+
+    def evaluate(self, party: str, lat: float, lng: float) -> list[dict]:
+        events = []
+        target = None
+        target_d2 = 0.0
+        for fence in self.fences:
+            d2 = fence.dist2(lat, lng)
+            if fence.kind not in self.inside and d2 <= fence.enter2:
+                self.inside.add(fence.kind)
+                events.append({"event": "arrived", "party": party, "fence": fence.kind})
+                if fence.kind == FENCE_MEETING_POINT:
+                    self.reached_meeting_point = True
+            elif fence.kind in self.inside and d2 > fence.exit2:
+                self.inside.discard(fence.kind)
+                events.append({"event": "departed", "party": party, "fence": fence.kind})
+            if target is None and not (fence.kind == FENCE_MEETING_POINT and self.reached_meeting_point):
+                target, target_d2 = fence, d2
+        if target is not None and target.kind not in self.inside:
+            self._track_progress(party, target, math.sqrt(target_d2), events)
+        return events
+
+    def _track_progress(self, party: str, target: Fence, d: float, events: list[dict]) -> None:
+        if target.kind != self.target:
+            self.target, self.best_m = target.kind, None
+        if self.best_m is None or d < self.best_m:
+            self.best_m = d
+            self.diverging = False
+        elif not self.diverging and d - self.best_m > settings.GEOFENCE_DIVERGE_M:
+            self.diverging = True
+            events.append({"event": "diverging", "party": party, "fence": target.kind, "distance_m": round(d, 1)})
+
+    def at_destination(self) -> bool:
+        return FENCE_DESTINATION in self.inside
+
+
+@dataclass
+class SessionFences:
+    parties: dict[str, PartyFences]
+
+
+class GeofenceService:
+    """Per-process fence state for sessions with a connected location socket (bounded, least-recently-updated evicted)."""
+
+    def __init__(self, max_sessions: int) -> None:
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[int, SessionFences]" = OrderedDict()
+
+    def register(
+        self,
+        session_id: int,
+        meeting_point: tuple[float, float] | None,
+        destinations: dict[str, tuple[float, float] | None],
+    ) -> None:
+        """Precompute fences for a session (idempotent: existing inside/progress state is kept)."""
+        if session_id in self._sessions:
+            self._sessions.move_to_end(session_id)
+            return
+        parties = {}
+        for party, dest in destinations.items():
+            fences = []
+            # Meeting point first: it is the target until reached
+            if meeting_point:
+                fences.append(Fence(FENCE_MEETING_POINT, *meeting_point, settings.GEOFENCE_MEETING_RADIUS_M))
+            if dest:
+                fences.append(Fence(FENCE_DESTINATION, *dest, settings.GEOFENCE_DESTINATION_RADIUS_M))
+            parties[party] = PartyFences(fences)
+        self._sessions[session_id] = SessionFences(parties)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+    def evaluate(self, session_id: int, party: str, lat: float, lng: float) -> list[dict]:
+        """Test one fix against the party's fences; returns the events it triggered (usually none)."""
+        entry = self._sessions.get(session_id)
+        if entry is None or party not in entry.parties:
+            return []
+        self._sessions.move_to_end(session_id)
+        metrics.incr("geofence.fixes")
+        events = entry.parties[party].evaluate(party, lat, lng)
+        if events:
+            metrics.incr("geofence.events", len(events))
+        return events
+
+    def at_destination(self, session_id: int, party: str) -> bool | None:
+        """Whether the party is inside their destination fence (None if the session is not registered here)."""
+        entry = self._sessions.get(session_id)
+        if entry is None or party not in entry.parties:
+            return None
+        return entry.parties[party].at_destination()
+
+    def drop(self, session_id: int) -> None:
+        self._sessions.pop(session_id, None)
+
+
+geofence_service = GeofenceService(max_sessions=settings.ETA_MAX_SESSIONS)
+metrics.register_gauge("geofence.sessions", lambda: len(geofence_service._sessions))
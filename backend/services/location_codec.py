@@ -0,0 +1,76 @@
+"""Compact binary location frames, negotiated with the WebSocket subprotocol SUBPROTOCOL.
+
+A frame is a packed array of fixed-width little-endian records (lat, lng as int32 degrees * 1e7, then
+uint32 unix seconds), 12 bytes per fix instead of ~40 for JSON, so a phone can flush fixes buffered while
+offline in one frame. On /ws/mux the records are prefixed by the uint32 session id.
+JSON fixes ({ lat, lng }) go through the same coordinate checks (json_fix).
+"""
+import math
+import struct
+from typing import Iterable
+
+SUBPROTOCOL = "lmc.loc.v1"
+
+_RECORD = struct.Struct("<iiI")
+_SESSION = struct.Struct("<I")
+_SCALE = 1e7
+MAX_FIXES_PER_FRAME = 1024
+
+Fix = tuple[float, float, float]
+
+
+class FrameError(ValueError):
+    """Malformed binary location frame."""
+
+
+def _check_coordinates(lat: float, lng: float) -> None:
+    if not (-90.0 <= lat <= 90.0 and -180.0 <= lng <= 180.0):
+        raise FrameError("coordinates out of range")
+
+
+def json_fix(obj: object) -> tuple[float, float, None]:
+    """(lat, lng, None) from a JSON { lat, lng } object; raises FrameError unless both are finite and in range."""
+    try:
+        lat, lng = float(obj["lat"]), float(obj["lng"])
+    except (KeyError, TypeError, ValueError):
+        raise FrameError("lat and lng are required numbers")
+    if not (math.isfinite(lat) and math.isfinite(lng)):
+        raise FrameError("coordinates must be finite")
+    _check_coordinates(lat, lng)
+    return lat, lng, None
+
+
+def encode_fixes(fixes: Iterable[Fix]) -> bytes:
+    return b"".join(_RECORD.pack(round(lat * _SCALE), round(lng * _SCALE), int(ts)) for lat, lng, ts in fixes)
+
+
+def decode_fixes(data: bytes) -> list[Fix]:
+    """Records in timestamp order; raises FrameError on a bad length, too many records or out-of-range coordinates."""
+    if not data or len(data) % _RECORD.size:
+        raise FrameError("frame length is not a multiple of the record size")
+    if len(data) // _RECORD.size > MAX_FIXES_PER_FRAME:
+        raise FrameError("too many fixes in one frame")
+    fixes = []
+    for lat_e7, lng_e7, ts in _RECORD.iter_unpack(data):
+        lat, lng = lat_e7 / _SCALE, lng_e7 / _SCALE
+        _check_coordinates(lat, lng)
+        fixes.append((lat, lng, float(ts)))
+    fixes.sort(key=lambda f: f[2])
+    return fixes
+
+
+def check_times(fixes: list[Fix], now: float, max_age_s: float, max_skew_s: float) -> None:
+    """Raise FrameError if a record's timestamp is in the future (beyond max_skew_s) or older than max_age_s."""
+    if fixes and (fixes[-1][2] > now + max_skew_s or fixes[0][2] < now - max_age_s):
+        raise FrameError("fix timestamp outside the accepted window")
+
+
+def encode_mux(session_id: int, fixes: Iterable[Fix]) -> bytes:
+    return _SESSION.pack(session_id) + encode_fixes(fixes)
+
+
+def decode_mux(data: bytes) -> tuple[int, list[Fix]]:
+    if len(data) < _SESSION.size:
+        raise FrameError("frame too short")
+    (session_id,) = _SESSION.unpack_from(data)
+    return session_id, decode_fixes(data[_SESSION.size:])
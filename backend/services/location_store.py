@@ -1,27 +1,246 @@
-"""Ephemeral location storage in Redis (TTL, no history)."""
+"""Ephemeral location storage in Redis (TTL, bounded history), deleted when the session ends.
+
+One hash per session, one field per party ("a"/"b"), so each party's write touches only its own field.
+Every fix is also appended to a per-session stream (the trail), capped at LOCATION_TRAIL_MAXLEN entries.
+HSET + XADD + EXPIREs go out as a single MULTI/EXEC pipeline (one round-trip, no read-modify-write race).
+The same pipeline publishes the fix on the session's feed channel for live push to the peer, and records the
+party's latest ETA and whether they are at their destination in per-session hashes, reading back both parties'
+(their sockets may be on different workers). Ending a session deletes its keys and leaves an "ended" marker
+that the write path checks, so a socket that is still open cannot bring them back.
+"""
 import json
-from typing import Any
+import time
+from datetime import datetime
+from typing import Any, Iterable, NamedTuple
 
 from backend.config import settings
 
 
 def _key(session_id: int) -> str:
-    return f"session:{session_id}:locations"
+    return f"session:{session_id}:loc"
+
+
+def _trail_key(session_id: int) -> str:
+    return f"session:{session_id}:trail"
+
+
+def _eta_key(session_id: int) -> str:
+    return f"session:{session_id}:eta"
+
+
+def _trail_keep_key(session_id: int) -> str:
+    return f"session:{session_id}:trail_keep"
+
+
+def _ended_key(session_id: int) -> str:
+    return f"session:{session_id}:ended"
+
+
+def _arrived_key(session_id: int) -> str:
+    return f"session:{session_id}:arrived"
+
+
+def _completing_key(session_id: int) -> str:
+    return f"session:{session_id}:completing"
+
+
+# How long clear_sessions' ended marker turns away fixes from sockets still open on the session
+ENDED_TTL_SECONDS = 24 * 3600
+
+
+class SessionEnded(Exception):
+    """Fixes for a session whose live state was already cleared (it is no longer ACTIVE)."""
+
+
+class PartyStates(NamedTuple):
+    """Both parties' state as read back by set_locations: latest ETA payloads and who is at their destination."""
+
+    etas: dict[str, dict]
+    arrived: set[str]
+
+
+def feed_channel(session_id: int) -> str:
+    """Pub/sub channel carrying every fix for a session as {type: "location", session_id, party, lat, lng}."""
+    return f"session:{session_id}:locfeed"
+
+
+def _decode(fields: dict) -> dict[str, dict[str, float]]:
+    out = {}
+    for party, raw in fields.items():
+        if isinstance(party, bytes):
+            party = party.decode()
+        out[party] = json.loads(raw)
+    return out
+
+
+def _text(value: Any) -> str:
+    return value.decode() if isinstance(value, bytes) else value
 
 
 async def set_location(redis: Any, session_id: int, party: str, lat: float, lng: float) -> None:
-    """Write party's last location; merge with existing a/b. TTL on key."""
+    """Write party's last location, append it to the trail and publish it, atomically in one round-trip."""
+    await set_locations(redis, session_id, party, [(lat, lng, None)])
+
+
+async def set_locations(
+    redis: Any,
+    session_id: int,
+    party: str,
+    fixes: list[tuple[float, float, float | None]],
+    eta: dict | None = None,
+    trail_expires_at: float | None = None,
+    at_destination: bool | None = None,
+) -> PartyStates | None:
+    """
+    Ingest a batch of fixes (oldest first, e.g. buffered while offline; ts None means now) in one round-trip.
+    Every fix goes to the trail; only the newest becomes the last-known position and is published.
+    trail_expires_at (unix seconds, see trail_expiry) is when the trail may go; it only ever moves later, so
+    a trail kept for an SOS is not shortened by later fixes. Without it the trail lives
+    LOCATION_TRAIL_AFTER_END_SECONDS past the last fix.
+    eta (this party's payload after the batch) and at_destination (None: unknown) are stored for the party;
+    returns both parties' PartyStates (etas empty unless eta was given), or None for an empty batch.
+    The same MULTI reads the SOS retention (keep_trail) and the ended marker (clear_sessions), so a trail
+    first written after an SOS is still kept, and fixes arriving after the end are removed again and raise
+    SessionEnded; both cost a second round-trip only when they apply.
+    """
+    if not fixes:
+        return None
     key = _key(session_id)
-    raw = await redis.get(key)
-    data = json.loads(raw) if raw else {}
-    data[party] = {"lat": lat, "lng": lng}
-    await redis.setex(key, settings.SESSION_LOCATION_TTL_SECONDS, json.dumps(data))
+    trail = _trail_key(session_id)
+    now = time.time()
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.exists(_ended_key(session_id))
+        pipe.get(_trail_keep_key(session_id))
+        for lat, lng, ts in fixes:
+            pipe.xadd(
+                trail,
+                {"p": party, "lat": lat, "lng": lng, "ts": ts if ts is not None else now},
+                maxlen=settings.LOCATION_TRAIL_MAXLEN,
+                approximate=True,
+            )
+        lat, lng, _ = fixes[-1]
+        pipe.hset(key, party, json.dumps({"lat": lat, "lng": lng}))
+        pipe.expire(key, settings.SESSION_LOCATION_TTL_SECONDS)
+        expires_at = int(trail_expires_at or now + settings.LOCATION_TRAIL_AFTER_END_SECONDS)
+        pipe.expireat(trail, expires_at, nx=True)
+        pipe.expireat(trail, expires_at, gt=True)
+        pipe.publish(
+            feed_channel(session_id),
+            json.dumps({"type": "location", "session_id": session_id, "party": party, "lat": lat, "lng": lng}),
+        )
+        arrived = _arrived_key(session_id)
+        if at_destination:
+            pipe.hset(arrived, party, 1)
+            pipe.expire(arrived, settings.SESSION_LOCATION_TTL_SECONDS)
+        elif at_destination is not None:
+            pipe.hdel(arrived, party)
+        pipe.hkeys(arrived)
+        if eta is not None:
+            eta_key = _eta_key(session_id)
+            pipe.hset(eta_key, party, json.dumps(eta))
+            pipe.expire(eta_key, settings.SESSION_LOCATION_TTL_SECONDS)
+            pipe.hgetall(eta_key)
+        results = await pipe.execute()
+    ended, keep_until = results[0], results[1]
+    if ended:
+        await clear_sessions(redis, [session_id], keep_trail_ids=[session_id] if keep_until else [])
+        raise SessionEnded(session_id)
+    if keep_until is not None and int(keep_until) > expires_at:
+        await redis.expireat(trail, int(keep_until), gt=True)
+    if eta is None:
+        return PartyStates({}, {_text(p) for p in results[-1]})
+    return PartyStates(_decode(results[-1]), {_text(p) for p in results[-4]})
+
+
+async def claim_completion(redis: Any, session_id: int) -> bool:
+    """
+    True for exactly one caller, across workers, per session: whoever gets to complete it once both parties
+    have arrived. The claim outlives clear_sessions (it expires with the live state) so a completed session
+    is not claimed again by fixes still in flight.
+    """
+    return bool(await redis.set(_completing_key(session_id), 1, nx=True, ex=settings.SESSION_LOCATION_TTL_SECONDS))
+
+
+def trail_expiry(ends_at: datetime | None) -> float:
+    """When a session's trail may expire: LOCATION_TRAIL_AFTER_END_SECONDS after its planned end."""
+    end = ends_at.timestamp() if ends_at is not None else time.time()
+    return end + settings.LOCATION_TRAIL_AFTER_END_SECONDS
+
+
+async def keep_trail(redis: Any, session_id: int) -> None:
+    """
+    Keep the trail for LOCATION_TRAIL_SOS_RETAIN_SECONDS (after an SOS), whatever happens to the session. The
+    retention is also recorded for set_locations, in case the trail does not exist yet.
+    """
+    until = int(time.time() + settings.LOCATION_TRAIL_SOS_RETAIN_SECONDS)
+    trail = _trail_key(session_id)
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.set(_trail_keep_key(session_id), until, exat=until)
+        pipe.expireat(trail, until, nx=True)
+        pipe.expireat(trail, until, gt=True)
+        await pipe.execute()
+
+
+async def clear_sessions(redis: Any, session_ids: Iterable[int], keep_trail_ids: Iterable[int] = ()) -> None:
+    """
+    Delete the live state of ended sessions, and their trails unless listed in keep_trail_ids (SOS), and mark
+    them ended so fixes from sockets still open are turned away (see set_locations).
+    """
+    keep = set(keep_trail_ids)
+    ids = list(session_ids)
+    if not ids:
+        return
+    keys = []
+    for sid in ids:
+        keys += [_key(sid), _eta_key(sid), _arrived_key(sid)]
+        if sid not in keep:
+            keys += [_trail_key(sid), _trail_keep_key(sid)]
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.delete(*keys)
+        for sid in ids:
+            pipe.set(_ended_key(sid), 1, ex=ENDED_TTL_SECONDS)
+        await pipe.execute()
 
 
 async def get_locations(redis: Any, session_id: int) -> dict[str, dict[str, float]]:
     """Read current locations for both parties. Returns e.g. { \"a\": { lat, lng }, \"b\": { ... } }."""
-    key = _key(session_id)
-    raw = await redis.get(key)
-    if not raw:
+    return _decode(await redis.hgetall(_key(session_id)))
+
+
+async def get_locations_many(redis: Any, session_ids: Iterable[int]) -> dict[int, dict[str, dict[str, float]]]:
+    """Read locations for many sessions in one pipelined round-trip. Sessions with no data map to {}."""
+    ids = list(session_ids)
+    if not ids:
         return {}
-    return json.loads(raw)
+    async with redis.pipeline(transaction=False) as pipe:
+        for sid in ids:
+            pipe.hgetall(_key(sid))
+        results = await pipe.execute()
+    return {sid: _decode(fields) for sid, fields in zip(ids, results)}
+
+
+async def get_trail(
+    redis: Any,
+    session_id: int,
+    since: float | None = None,
+    until: float | None = None,
+    limit: int | None = None,
+) -> list[dict]:
+    """
+    Trail entries, oldest first, as { party, lat, lng, ts }. since/until (unix seconds) bound the time the
+    server received the fix; without since, limit keeps the most recent entries.
+    """
+    trail = _trail_key(session_id)
+    low = f"{int(since * 1000)}" if since is not None else "-"
+    high = f"{int(until * 1000)}" if until is not None else "+"
+    if since is None and limit is not None:
+        entries = list(reversed(await redis.xrevrange(trail, max=high, min=low, count=limit)))
+    else:
+        entries = await redis.xrange(trail, min=low, max=high, count=limit)
+    out = []
+    for _, fields in entries:
+        fields = {_text(k): _text(v) for k, v in fields.items()}
+        out.append(
+            {"party": fields["p"], "lat": float(fields["lat"]), "lng": float(fields["lng"]), "ts": float(fields["ts"])}
+        )
+    return out
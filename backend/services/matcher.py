@@ -7,10 +7,14 @@ from sqlalchemy import and_, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.sql import func
 
+from backend.config import settings
 from backend.models.intent import Intent
 from backend.models.rating import Rating
 from backend.models.session import Session, SessionState
 from backend.models.user import User
+from backend.services import metrics
+from backend.services.osrm import OsrmUnavailable
+from backend.services.walk_times import walking_pairs
 
 
 # Meters; origin within this distance considered "nearby"
@@ -21,6 +25,10 @@ GEOGRAPHY_RADIUS_M = ORIGIN_RADIUS_M
 ROUTE_WEIGHT = 0.7
 RATING_WEIGHT = 0.3
 
+# Route overlap scoring modes (see settings.MATCH_SCORING)
+SCORING_HAVERSINE = "haversine"
+SCORING_WALKING = "walking"
+
 
 def _haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
     """Approximate distance in km between two WGS84 points."""
@@ -48,16 +56,36 @@ class MatchResult:
     past_rating_avg: float | None
 
 
+async def _walking_km(
+    source_origin: tuple[float, float],
+    source_dest: tuple[float, float],
+    candidates: list[tuple[tuple[float, float], tuple[float, float]]],
+) -> list[tuple[float | None, float | None]] | None:
+    """Walking (origin km, dest km) per candidate from one batched OSRM table call; None if OSRM is unavailable."""
+    pairs = [(source_origin, o) for o, _ in candidates] + [(source_dest, d) for _, d in candidates]
+    try:
+        values = await walking_pairs(pairs, budget_s=settings.MATCH_OSRM_BUDGET_SECONDS)
+    except OsrmUnavailable:
+        metrics.incr("match.walking_fallbacks")
+        return None
+    km = [v[0] / 1000.0 if v is not None else None for v in values]
+    n = len(candidates)
+    return [(km[i], km[n + i]) for i in range(n)]
+
+
 async def find_matches(
     db: AsyncSession,
     intent_id: int,
     limit: int = 20,
+    scoring: str | None = None,
 ) -> list[MatchResult]:
     """
     Return match cards: other intents that are nearby, time-overlapping, and satisfy vehicle rule.
     Vehicle rule: if my intent's user has_vehicle, match must be from a user without vehicle (walker).
     Exclude intents already in a non-terminal session.
     Scores: route_overlap_score 0-100, past_rating_avg 0-5 (or None).
+    scoring: "haversine" or "walking" (defaults to settings.MATCH_SCORING). Walking falls back to
+    haversine per candidate when OSRM has no route, and for all candidates when OSRM is slow or down.
     """
     now = datetime.now(timezone.utc)
     in_session = select(Session.intent_a_id).where(Session.state.notin_([SessionState.COMPLETED, SessionState.ABORTED]))
@@ -67,10 +95,10 @@ async def find_matches(
     q_source = select(
         Intent.id,
         Intent.user_id,
-        func.ST_Y(Intent.origin).label("origin_lat"),
-        func.ST_X(Intent.origin).label("origin_lng"),
-        func.ST_Y(Intent.destination).label("dest_lat"),
-        func.ST_X(Intent.destination).label("dest_lng"),
+        Intent.origin_lat,
+        Intent.origin_lng,
+        Intent.dest_lat,
+        Intent.dest_lng,
         Intent.start_time,
         Intent.end_time,
     ).where(Intent.id == intent_id)
@@ -96,10 +124,10 @@ async def find_matches(
             User.name,
             User.avatar_url,
             User.has_vehicle,
-            func.ST_Y(Intent.origin).label("origin_lat"),
-            func.ST_X(Intent.origin).label("origin_lng"),
-            func.ST_Y(Intent.destination).label("dest_lat"),
-            func.ST_X(Intent.destination).label("dest_lng"),
+            Intent.origin_lat,
+            Intent.origin_lng,
+            Intent.dest_lat,
+            Intent.dest_lng,
         )
         .join(User, Intent.user_id == User.id)
         .where(Intent.id != intent_id)
@@ -139,12 +167,24 @@ async def find_matches(
     )
     rating_map = {r.ratee_id: float(r.avg_score) for r in (await db.execute(q_ratings)).all()}
 
+    walking_km = None
+    if rows and (scoring or settings.MATCH_SCORING) == SCORING_WALKING:
+        walking_km = await _walking_km(
+            (source_origin_lat, source_origin_lng),
+            (source_dest_lat, source_dest_lng),
+            [
+                ((float(r.origin_lat), float(r.origin_lng)), (float(r.dest_lat), float(r.dest_lng)))
+                for r in rows
+            ],
+        )
+
     results = []
-    for r in rows:
+    for i, r in enumerate(rows):
         o_lat, o_lng = float(r.origin_lat), float(r.origin_lng)
         d_lat, d_lng = float(r.dest_lat), float(r.dest_lng)
-        d_origin_km = _haversine_km(source_origin_lat, source_origin_lng, o_lat, o_lng)
-        d_dest_km = _haversine_km(source_dest_lat, source_dest_lng, d_lat, d_lng)
+        walk_origin_km, walk_dest_km = walking_km[i] if walking_km else (None, None)
+        d_origin_km = walk_origin_km if walk_origin_km is not None else _haversine_km(source_origin_lat, source_origin_lng, o_lat, o_lng)
+        d_dest_km = walk_dest_km if walk_dest_km is not None else _haversine_km(source_dest_lat, source_dest_lng, d_lat, d_lng)
         total_km = d_origin_km + d_dest_km
         route_overlap_score = 100.0 * math.exp(-total_km / 5.0)
         past_rating_avg = rating_map.get(r.user_id)
@@ -0,0 +1,36 @@
+"""In-process counters and gauges for the /api/metrics endpoint (per worker, no external exporter)."""
+from typing import Callable
+
+_counters: dict[str, float] = {}
+_gauges: dict[str, Callable[[], float | str | None]] = {}
+
+
+def incr(name: str, value: float = 1) -> None:
+    """Add value to a named counter (created on first use)."""
+    _counters[name] = _counters.get(name, 0) + value
+
+
+def get(name: str) -> float:
+    return _counters.get(name, 0)
+
+
+def ratio(numerator: str, denominator: str) -> float:
+    """numerator / denominator of two counters; 0.0 when nothing has been counted yet."""
+    total = _counters.get(denominator, 0)
+    return round(_counters.get(numerator, 0) / total, 4) if total else 0.0
+
+
+def register_gauge(name: str, fn: Callable[[], float | str | None]) -> None:
+    """Register a callable evaluated on every snapshot (e.g. breaker state, queue depth)."""
+    _gauges[name] = fn
+
+
+def snapshot() -> dict[str, dict]:
+    """Return {"counters": {...}, "gauges": {...}} for this process."""
+    gauges = {}
+    for name, fn in _gauges.items():
+        try:
+            gauges[name] = fn()
+        except Exception:
+            gauges[name] = None
+    return {"counters": dict(_counters), "gauges": gauges}
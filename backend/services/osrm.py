@@ -5,13 +5,102 @@ Uses the public OSRM demo server by default (fine for demos; not for production
 
 from __future__ import annotations
 
-from typing import Any
+import asyncio
+import time
+from typing import Any, Awaitable, TypeVar
 
 import httpx
 
+from backend.config import settings
+from backend.services import metrics
+from backend.services.geo import bearing_deg, compass_direction, haversine_m
+
 
 DEFAULT_OSRM_BASE_URL = "https://router.project-osrm.org"
 
+T = TypeVar("T")
+
+
+class OsrmUnavailable(Exception):
+    """OSRM call skipped (breaker open) or failed / ran past its latency budget."""
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker: CLOSED -> OPEN after N failures, HALF_OPEN probe after reset_timeout_s."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout_s: float) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_s = reset_timeout_s
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self._opened_at >= self.reset_timeout_s:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self) -> bool:
+        """True if a call may go through. In HALF_OPEN only one probe is let through at a time."""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    def release_probe(self) -> None:
+        """Let the next HALF_OPEN probe through without counting a result (e.g. the probe was cancelled)."""
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        self._probing = False
+        if self._opened_at is not None or self._failures >= self.failure_threshold:
+            self._opened_at = time.monotonic()
+            metrics.incr("osrm.breaker_opened")
+
+
+osrm_breaker = CircuitBreaker(
+    failure_threshold=settings.OSRM_BREAKER_FAILURE_THRESHOLD,
+    reset_timeout_s=settings.OSRM_BREAKER_RESET_SECONDS,
+)
+metrics.register_gauge("osrm.breaker_state", lambda: osrm_breaker.state)
+
+
+async def call_with_budget(call: Awaitable[T], budget_s: float) -> T:
+    """Await an OSRM call through the breaker, giving up after budget_s. Raises OsrmUnavailable."""
+    if not osrm_breaker.allow():
+        if asyncio.iscoroutine(call):
+            call.close()
+        metrics.incr("osrm.short_circuited")
+        raise OsrmUnavailable("OSRM circuit open")
+    try:
+        result = await asyncio.wait_for(call, timeout=budget_s)
+    except Exception as e:
+        # Timeouts, HTTP errors and malformed responses (ValueError, KeyError, ...) all count against OSRM
+        osrm_breaker.record_failure()
+        metrics.incr("osrm.failures")
+        raise OsrmUnavailable(str(e) or type(e).__name__) from e
+    finally:
+        # A cancelled probe records nothing but must not keep HALF_OPEN closed to every later call
+        osrm_breaker.release_probe()
+    osrm_breaker.record_success()
+    return result
+
 
 def _format_instruction(maneuver: dict[str, Any], name: str | None) -> str:
     mtype = maneuver.get("type") or "continue"
@@ -75,3 +164,52 @@ async def get_walking_route_steps(
         )
     return distance_m, duration_s, normalized
 
+
+async def get_walking_table(
+    sources: list[tuple[float, float]],
+    destinations: list[tuple[float, float]],
+    base_url: str = DEFAULT_OSRM_BASE_URL,
+    timeout_s: float = 10.0,
+) -> tuple[list[list[float | None]], list[list[float | None]]]:
+    """One OSRM table request: (distances_m, durations_s), each len(sources) x len(destinations). Points are (lat, lng)."""
+    points = list(sources) + list(destinations)
+    coords = ";".join(f"{lng},{lat}" for lat, lng in points)
+    url = f"{base_url.rstrip('/')}/table/v1/walking/{coords}"
+    params = {
+        "sources": ";".join(str(i) for i in range(len(sources))),
+        "destinations": ";".join(str(len(sources) + i) for i in range(len(destinations))),
+        "annotations": "distance,duration",
+    }
+    async with httpx.AsyncClient(timeout=timeout_s) as client:
+        r = await client.get(url, params=params, headers={"Accept": "application/json"})
+        r.raise_for_status()
+        data = r.json()
+    if data.get("code") not in (None, "Ok"):
+        raise ValueError(f"OSRM table error: {data.get('code')}")
+    distances = data.get("distances") or []
+    durations = data.get("durations") or []
+    if len(distances) != len(sources) or len(durations) != len(sources):
+        raise ValueError("OSRM table: unexpected matrix shape")
+    if any(len(row) != len(destinations) for row in distances + durations):
+        raise ValueError("OSRM table: ragged matrix row")
+    return distances, durations
+
+
+def straight_line_route(
+    origin_lat: float,
+    origin_lng: float,
+    dest_lat: float,
+    dest_lng: float,
+) -> tuple[float, float, list[dict[str, Any]]]:
+    """Degraded (distance_m, duration_s, steps): haversine distance at walking speed, one "head toward" step."""
+    distance_m = haversine_m(origin_lat, origin_lng, dest_lat, dest_lng)
+    duration_s = distance_m / settings.WALKING_SPEED_MPS
+    direction = compass_direction(bearing_deg(origin_lat, origin_lng, dest_lat, dest_lng))
+    steps = [
+        {
+            "instruction": f"Head {direction} toward destination",
+            "distance_m": distance_m,
+            "duration_s": duration_s,
+        }
+    ]
+    return distance_m, duration_s, steps
@@ -0,0 +1,117 @@
+"""Per-process Redis pub/sub hub: one subscriber connection per worker, fanning messages out to local handlers.
+
+A channel is subscribed on Redis only while at least one local handler is registered for it, so a worker
+receives only the traffic its own sockets need.
+
+Handlers run on the single reader task: they must only queue the message (e.g. updates_manager.send) and
+never await socket I/O, or one slow socket holds up every channel on the worker.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable
+
+from backend.services import metrics
+
+Handler = Callable[[bytes], Awaitable[None]]
+
+# Backstop for a handler that blocks anyway; handlers are expected to return without waiting
+HANDLER_TIMEOUT_SECONDS = 5.0
+
+
+class RedisPubSubHub:
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._redis: Any = None
+        self._pubsub: Any = None
+        self._task: asyncio.Task | None = None
+        self._running = False
+        self._handlers: dict[str, set[Handler]] = {}
+        metrics.register_gauge(f"{name}.channels", lambda: len(self._handlers))
+
+    @property
+    def started(self) -> bool:
+        return self._redis is not None and self._running
+
+    async def start(self, redis: Any) -> None:
+        self._redis = redis
+        self._pubsub = redis.pubsub()
+        self._running = True
+        self._task = asyncio.create_task(self._reader())
+
+    async def stop(self) -> None:
+        self._running = False
+        if self._task:
+            self._task.cancel()
+            # redis-py's read timeout can swallow a cancel that races with it; the flag ends the loop anyway
+            try:
+                await asyncio.wait_for(self._task, timeout=2.0)
+            except (asyncio.CancelledError, asyncio.TimeoutError):
+                pass
+            self._task = None
+        if self._pubsub is not None:
+            await self._pubsub.close()
+            self._pubsub = None
+        self._handlers.clear()
+
+    async def subscribe(self, channel: str, handler: Handler) -> None:
+        handlers = self._handlers.setdefault(channel, set())
+        handlers.add(handler)
+        if len(handlers) == 1 and self._pubsub is not None:
+            await self._pubsub.subscribe(channel)
+
+    async def unsubscribe(self, channel: str, handler: Handler) -> None:
+        handlers = self._handlers.get(channel)
+        if not handlers:
+            return
+        handlers.discard(handler)
+        if not handlers:
+            del self._handlers[channel]
+            if self._pubsub is not None:
+                await self._pubsub.unsubscribe(channel)
+
+    @property
+    def redis(self) -> Any:
+        return self._redis
+
+    async def publish(self, channel: str, data: str | bytes) -> None:
+        await self._redis.publish(channel, data)
+
+    async def publish_many(self, messages: list[tuple[str, str | bytes]]) -> None:
+        """Publish several (channel, data) messages in one pipelined round-trip."""
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for channel, data in messages:
+                pipe.publish(channel, data)
+            await pipe.execute()
+
+    async def _deliver(self, handler: Handler, data: bytes) -> None:
+        try:
+            await asyncio.wait_for(handler(data), timeout=HANDLER_TIMEOUT_SECONDS)
+        except Exception:
+            metrics.incr(f"{self.name}.handler_errors")
+
+    async def _reader(self) -> None:
+        while self._running:
+            if not self._pubsub.subscribed:
+                await asyncio.sleep(0.1)
+                continue
+            try:
+                message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                metrics.incr(f"{self.name}.reader_errors")
+                await asyncio.sleep(1.0)
+                continue
+            if not message or message.get("type") != "message":
+                continue
+            channel = message["channel"]
+            if isinstance(channel, bytes):
+                channel = channel.decode()
+            handlers = self._handlers.get(channel)
+            if not handlers:
+                continue
+            metrics.incr(f"{self.name}.messages")
+            await asyncio.gather(*[self._deliver(h, message["data"]) for h in list(handlers)])
+
+
+# Live peer locations: channel per session (see location_store.feed_channel)
+location_hub = RedisPubSubHub("location_hub")
@@ -0,0 +1,28 @@
+"""Fixed-window request counters in Redis (shared by all workers), for the auth endpoints.
+
+Each key counts hits in the current window (INCR, with the window set as TTL on the first hit). Redis being
+unavailable lets requests through rather than locking everyone out.
+"""
+from redis.exceptions import RedisError
+
+from backend.redis_client import get_redis
+from backend.services import metrics
+
+
+async def hit(key: str, limit: int, window_s: int) -> int | None:
+    """Count one hit on key; returns seconds until the window resets if the limit is exceeded, else None."""
+    key = f"ratelimit:{key}"
+    try:
+        redis = await get_redis()
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.incr(key)
+            pipe.expire(key, window_s, nx=True)
+            pipe.ttl(key)
+            count, _, ttl = await pipe.execute()
+    except (RuntimeError, RedisError):
+        metrics.incr("rate_limit.errors")
+        return None
+    if count <= limit:
+        return None
+    metrics.incr("rate_limit.rejected")
+    return ttl if ttl > 0 else window_s
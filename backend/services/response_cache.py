@@ -0,0 +1,78 @@
+"""Per-user cache of serialized list responses (GET /api/sessions/me, GET /api/intents) in Redis.
+
+Entries are the exact JSON bytes the route returns, under cache:<kind>:<user_id>. The notify path
+(ws_updates.notify_many) invalidates a user's entry whenever it pushes them a "sessions" or "intents" frame, so
+every write that clients hear about also drops the cached list on every worker.
+
+Routes commit before they notify, but a read that started before the commit may still be building the old
+list. Invalidation therefore writes a short-lived empty marker (RESPONSE_CACHE_SETTLE_SECONDS) instead of
+deleting: reads that see it go to the database and do not store, so such a read cannot put the old list back. Entries also expire after RESPONSE_CACHE_TTL_SECONDS
+(or sooner, see store's ttl_s) in case an event is lost.
+"""
+from typing import Awaitable, Callable, Iterable
+
+from redis.exceptions import RedisError
+
+from backend.config import settings
+from backend.redis_client import get_redis
+from backend.services import metrics
+
+KINDS = ("sessions", "intents")
+_SETTLING = b""
+
+for _kind in KINDS:
+    metrics.register_gauge(
+        f"response_cache.{_kind}.hit_rate",
+        lambda kind=_kind: metrics.ratio(f"response_cache.{kind}.hits", f"response_cache.{kind}.lookups"),
+    )
+
+
+def _key(kind: str, user_id: int) -> str:
+    return f"cache:{kind}:{user_id}"
+
+
+async def cached(
+    kind: str, user_id: int, build: Callable[[], Awaitable[tuple[bytes, float | None]]]
+) -> bytes:
+    """
+    The user's cached body for kind, or build() it: build returns (body, ttl_s), ttl_s None for the default
+    TTL (e.g. the time until the first listed intent expires). Redis errors fall through to build().
+    """
+    metrics.incr(f"response_cache.{kind}.lookups")
+    key = _key(kind, user_id)
+    try:
+        redis = await get_redis()
+        raw = await redis.get(key)
+    except (RuntimeError, RedisError):
+        redis, raw = None, None
+    if raw:
+        metrics.incr(f"response_cache.{kind}.hits")
+        return raw
+    metrics.incr(f"response_cache.{kind}.misses")
+    body, ttl_s = await build()
+    if redis is None or raw == _SETTLING:
+        return body
+    ttl_s = settings.RESPONSE_CACHE_TTL_SECONDS if ttl_s is None else min(ttl_s, settings.RESPONSE_CACHE_TTL_SECONDS)
+    if ttl_s > 0:
+        try:
+            # NX: an invalidation that landed while we were querying wins
+            await redis.set(key, body, px=int(ttl_s * 1000), nx=True)
+        except RedisError:
+            pass
+    return body
+
+
+async def invalidate(entries: Iterable[tuple[str, int]]) -> None:
+    """Drop the cached (kind, user_id) entries and hold them off for the settle window."""
+    keys = {_key(kind, uid) for kind, uid in entries}
+    if not keys:
+        return
+    try:
+        redis = await get_redis()
+        async with redis.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.set(key, _SETTLING, px=int(settings.RESPONSE_CACHE_SETTLE_SECONDS * 1000))
+            await pipe.execute()
+    except (RuntimeError, RedisError):
+        return
+    metrics.incr("response_cache.invalidations", len(keys))
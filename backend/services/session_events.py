@@ -0,0 +1,86 @@
+"""Session views and side effects shared by the session routes and the location sockets: the per-user view of
+a session, the update pushed to both parties when it changes, and the live state released when it ends.
+"""
+from backend.models.session import Session, SessionState
+from backend.redis_client import get_redis
+from backend.schemas.session import MeetingPoint, RoutePoints, SessionResponse
+from backend.services import deadlines
+from backend.services.eta import eta_service
+from backend.services.geofence import geofence_service
+from backend.services.location_store import clear_sessions
+from backend.services.meeting_point import best_meeting_point
+from backend.services.ws_updates import session_delete, session_upsert, updates_manager
+
+
+def meeting_point_for(route_a: RoutePoints | None, route_b: RoutePoints | None) -> MeetingPoint | None:
+    """
+    Rendezvous between both parties' origins (None until both routes are known). Computed once, when the
+    session is created, and stored on it: the walk times behind it come from a per-process cache.
+    """
+    if route_a is None or route_b is None:
+        return None
+    mp = best_meeting_point(
+        (route_a.origin.lat, route_a.origin.lng),
+        (route_b.origin.lat, route_b.origin.lng),
+    )
+    return MeetingPoint(**vars(mp))
+
+
+def session_to_response(
+    session: Session,
+    current_user_id: int,
+    route_a: RoutePoints | None = None,
+    route_b: RoutePoints | None = None,
+) -> SessionResponse:
+    my_side = None
+    my_token = None
+    if session.user_a_id == current_user_id:
+        my_side = "a"
+        my_token = session.token_a
+    elif session.user_b_id == current_user_id:
+        my_side = "b"
+        my_token = session.token_b
+    return SessionResponse(
+        id=session.id,
+        intent_a_id=session.intent_a_id,
+        intent_b_id=session.intent_b_id,
+        user_a_id=session.user_a_id,
+        user_b_id=session.user_b_id,
+        state=session.state,
+        started_at=session.started_at,
+        ends_at=session.ends_at,
+        max_duration_minutes=session.max_duration_minutes,
+        created_at=session.created_at,
+        my_side=my_side,
+        my_token=my_token,
+        sos_at=getattr(session, "sos_at", None),
+        route_a=route_a,
+        route_b=route_b,
+        meeting_point=session.meeting_point,
+    )
+
+
+async def notify_session(
+    session: Session,
+    route_a: RoutePoints | None = None,
+    route_b: RoutePoints | None = None,
+) -> None:
+    """Push the session to both parties as each of them sees it; ended sessions are pushed as deletes."""
+    if session.state in (SessionState.COMPLETED, SessionState.ABORTED):
+        await updates_manager.notify_users([session.user_a_id, session.user_b_id], session_delete(session.id))
+        return
+    await updates_manager.notify_many(
+        [
+            ([uid], session_upsert(session_to_response(session, uid, route_a, route_b)))
+            for uid in (session.user_a_id, session.user_b_id)
+        ]
+    )
+
+
+async def release_live_state(session: Session) -> None:
+    """Drop an ended session's ETA and geofence state, its auto-end deadline and its Redis location keys."""
+    eta_service.drop(session.id)
+    geofence_service.drop(session.id)
+    redis = await get_redis()
+    await deadlines.cancel(redis, session.id)
+    await clear_sessions(redis, [session.id], keep_trail_ids=[session.id] if session.sos_at else [])
@@ -0,0 +1,94 @@
+"""A user's session history, newest first, keyset-paginated on (created_at, session_id).
+
+The page is an index range scan on session_members' primary key (user_id, created_at, session_id) that stops
+after limit + 1 rows, so any page costs the same however long the history is. Each row is joined by primary
+key to sessions or, once archived, to sessions_archive, in the same statement.
+"""
+import base64
+import binascii
+from datetime import datetime
+
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.models.archive import SessionArchive
+from backend.models.session import Session
+from backend.models.session_member import SessionMember
+from backend.schemas.session import SessionHistoryItem, SessionHistoryPage
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(created_at: datetime, session_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{session_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, session_id = raw.split("|")
+        return datetime.fromisoformat(created_at), int(session_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise InvalidCursor("Invalid cursor") from e
+
+
+async def history_page(db: AsyncSession, user_id: int, limit: int, cursor: str | None = None) -> SessionHistoryPage:
+    """Up to limit sessions of user_id older than cursor (from the previous page's next_cursor)."""
+    page = (
+        select(SessionMember.session_id, SessionMember.created_at)
+        .where(SessionMember.user_id == user_id)
+        .order_by(SessionMember.created_at.desc(), SessionMember.session_id.desc())
+        .limit(limit + 1)
+    )
+    if cursor is not None:
+        created_at, session_id = decode_cursor(cursor)
+        page = page.where(
+            tuple_(SessionMember.created_at, SessionMember.session_id) < tuple_(created_at, session_id)
+        )
+    page = page.subquery("page")
+    hot, cold = Session.__table__, SessionArchive.__table__
+
+    def col(name: str):
+        return func.coalesce(hot.c[name], cold.c[name]).label(name)
+
+    q = (
+        select(
+            page.c.session_id,
+            page.c.created_at,
+            col("user_a_id"),
+            col("user_b_id"),
+            col("state"),
+            col("started_at"),
+            col("ends_at"),
+            col("sos_at"),
+            hot.c.id.is_(None).label("archived"),
+        )
+        .select_from(page)
+        .outerjoin(hot, hot.c.id == page.c.session_id)
+        .outerjoin(cold, (cold.c.id == page.c.session_id) & (cold.c.created_at == page.c.created_at))
+        .order_by(page.c.created_at.desc(), page.c.session_id.desc())
+    )
+    rows = (await db.execute(q)).all()
+    more = len(rows) > limit
+    rows = rows[:limit]
+    # Memberships of deleted sessions join nothing; skip them but keep the cursor moving
+    items = [
+        SessionHistoryItem(
+            id=r.session_id,
+            state=r.state,
+            my_side="a" if r.user_a_id == user_id else "b",
+            partner_user_id=r.user_b_id if r.user_a_id == user_id else r.user_a_id,
+            started_at=r.started_at,
+            ends_at=r.ends_at,
+            sos_at=r.sos_at,
+            created_at=r.created_at,
+            archived=r.archived,
+        )
+        for r in rows
+        if r.state is not None
+    ]
+    next_cursor = encode_cursor(rows[-1].created_at, rows[-1].session_id) if more else None
+    return SessionHistoryPage(items=items, next_cursor=next_cursor)
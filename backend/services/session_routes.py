@@ -0,0 +1,30 @@
+"""Origin/destination points of session intents (used for route_a/route_b, meeting point, ETA targets)."""
+from typing import Iterable
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.models.intent import Intent
+from backend.schemas.session import RoutePoint, RoutePoints
+
+
+async def route_points_by_intent(db: AsyncSession, intent_ids: Iterable[int]) -> dict[int, RoutePoints]:
+    """Return {intent_id: RoutePoints} for the given intents in one query."""
+    ids = set(intent_ids)
+    if not ids:
+        return {}
+    q = select(
+        Intent.id,
+        Intent.origin_lat,
+        Intent.origin_lng,
+        Intent.dest_lat,
+        Intent.dest_lng,
+    ).where(Intent.id.in_(ids))
+    result = await db.execute(q)
+    return {
+        row.id: RoutePoints(
+            origin=RoutePoint(lat=float(row.origin_lat), lng=float(row.origin_lng)),
+            destination=RoutePoint(lat=float(row.dest_lat), lng=float(row.dest_lng)),
+        )
+        for row in result.all()
+    }
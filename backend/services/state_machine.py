@@ -1,10 +1,14 @@
-"""Session state machine: enforce allowed transitions and side (token)."""
-from datetime import datetime, timezone
+"""Session state machine: enforce allowed transitions and side (token).
 
-from sqlalchemy import select
+A transition is one conditional UPDATE ... WHERE id AND state IN (allowed predecessors) AND party matches
+... RETURNING, so concurrent requests (e.g. accept vs abort) cannot both pass the check: the loser matches
+no row. Only then is the row read again, to say why (not found, not a party, or a state conflict).
+"""
+from sqlalchemy import func, or_, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.models.session import Session, SessionState
+from backend.services.deadlines import planned_end
 
 # Allowed transitions: from_state -> {to_state, ...}
 ALLOWED: dict[SessionState, set[SessionState]] = {
@@ -16,30 +20,66 @@ ALLOWED: dict[SessionState, set[SessionState]] = {
 }
 
 
+def predecessors(to_state: SessionState) -> list[SessionState]:
+    return [state for state, targets in ALLOWED.items() if to_state in targets]
+
+
+class SessionNotFound(ValueError):
+    pass
+
+
+class NotAParty(ValueError):
+    pass
+
+
+class TransitionConflict(ValueError):
+    """The session is not in a state that allows the transition (possibly changed by a concurrent request)."""
+
+    def __init__(self, message: str, state: SessionState) -> None:
+        super().__init__(message)
+        self.state = state
+
+
 async def transition(
     db: AsyncSession,
     session_id: int,
     to_state: SessionState,
-    token: str,
+    token: str | None = None,
+    user_id: int | None = None,
 ) -> Session:
     """
-    Transition session to to_state if token is valid for this session and transition is allowed.
-    Sets started_at when moving to ACTIVE. Returns updated Session; raises ValueError if invalid.
+    Transition session to to_state if the caller is a party (by session token or user id) and the transition
+    is allowed from the current state. Sets started_at and ends_at (the auto-end deadline) when moving to
+    ACTIVE. Without token and user_id it is a system transition (e.g. auto-complete). Returns the updated
+    Session in one round-trip; raises SessionNotFound, NotAParty or TransitionConflict (all ValueError) otherwise.
     """
+    values: dict = {"state": to_state}
+    if to_state == SessionState.ACTIVE:
+        values["started_at"] = func.coalesce(Session.started_at, func.now())
+        values["ends_at"] = planned_end(func.coalesce(Session.started_at, func.now()))
+    stmt = (
+        update(Session)
+        .where(Session.id == session_id, Session.state.in_(predecessors(to_state)))
+        .values(**values)
+        .returning(Session)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+    if token is not None:
+        stmt = stmt.where(or_(Session.token_a == token, Session.token_b == token))
+    if user_id is not None:
+        stmt = stmt.where(or_(Session.user_a_id == user_id, Session.user_b_id == user_id))
+    session = (await db.execute(stmt)).scalar_one_or_none()
+    if session is not None:
+        return session
+
     result = await db.execute(select(Session).where(Session.id == session_id))
-    session = result.scalar_one_or_none()
-    if not session:
-        raise ValueError("Session not found")
-    if token not in (session.token_a, session.token_b):
-        raise ValueError("Invalid token for this session")
-    current = session.state
-    if current in (SessionState.COMPLETED, SessionState.ABORTED):
-        raise ValueError("Session already ended")
-    if to_state not in ALLOWED.get(current, set()):
-        raise ValueError(f"Transition {current.value} -> {to_state.value} not allowed")
-    session.state = to_state
-    if to_state == SessionState.ACTIVE and session.started_at is None:
-        session.started_at = datetime.now(timezone.utc)
-    await db.flush()
-    await db.refresh(session)
-    return session
+    current = result.scalar_one_or_none()
+    if current is None:
+        raise SessionNotFound("Session not found")
+    if token is not None and token not in (current.token_a, current.token_b):
+        raise NotAParty("Invalid token for this session")
+    if user_id is not None and user_id not in (current.user_a_id, current.user_b_id):
+        raise NotAParty("Not a party to this session")
+    if current.state in (SessionState.COMPLETED, SessionState.ABORTED):
+        raise TransitionConflict("Session already ended", current.state)
+    raise TransitionConflict(f"Transition {current.state.value} -> {to_state.value} not allowed", current.state)
@@ -0,0 +1,97 @@
+"""Per-worker cache of authenticated users, so get_current_user does not query users on every request.
+
+Entries are detached snapshots of the User row, bounded by USER_CACHE_MAX (LRU) and USER_CACHE_TTL_SECONDS.
+get_current_user merges the snapshot into the request's session without loading, so routes that edit the
+user (PATCH /auth/me, avatar upload) still flush an UPDATE as before.
+
+Those routes call invalidate(), which drops the entry here and, over Redis pub/sub (users_hub), on every other
+worker. Like services/response_cache, an invalidated user is not re-cached for USER_CACHE_SETTLE_SECONDS, so a
+read racing the editing request's commit cannot put the old row back.
+"""
+import time
+from collections import OrderedDict
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
+
+from backend.config import settings
+from backend.models.user import User
+from backend.services import metrics
+from backend.services.pubsub import RedisPubSubHub
+
+INVALIDATE_CHANNEL = "users:invalidate"
+
+metrics.register_gauge("user_cache.hit_rate", lambda: metrics.ratio("user_cache.hits", "user_cache.lookups"))
+
+
+def _snapshot(user: User) -> User:
+    """A detached copy of user's column values, safe to share between sessions."""
+    copy = User(**{attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs})
+    make_transient_to_detached(copy)
+    return copy
+
+
+class UserCache:
+    def __init__(self, max_size: int, ttl_s: float, settle_s: float) -> None:
+        self._max_size = max_size
+        self._ttl_s = ttl_s
+        self._settle_s = settle_s
+        # user_id -> (expires at, snapshot); snapshot None marks a recently invalidated user
+        self._entries: "OrderedDict[int, tuple[float, User | None]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, user_id: int) -> User | None:
+        metrics.incr("user_cache.lookups")
+        entry = self._entries.get(user_id)
+        if entry is None or entry[1] is None or entry[0] < time.monotonic():
+            metrics.incr("user_cache.misses")
+            return None
+        self._entries.move_to_end(user_id)
+        metrics.incr("user_cache.hits")
+        return entry[1]
+
+    def put(self, user: User) -> None:
+        now = time.monotonic()
+        entry = self._entries.get(user.id)
+        if entry is not None and entry[1] is None and entry[0] > now:
+            return
+        self._entries[user.id] = (now + self._ttl_s, _snapshot(user))
+        self._entries.move_to_end(user.id)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+
+    def drop(self, user_id: int) -> None:
+        """Forget user_id on this worker and hold it off for the settle window."""
+        self._entries[user_id] = (time.monotonic() + self._settle_s, None)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+
+    async def invalidate(self, user_id: int) -> None:
+        """Forget user_id on every worker (call after changing the users row)."""
+        self.drop(user_id)
+        metrics.incr("user_cache.invalidations")
+        if users_hub.started:
+            try:
+                await users_hub.publish(INVALIDATE_CHANNEL, str(user_id))
+            except Exception:
+                metrics.incr("user_cache.publish_errors")
+
+    async def start(self) -> None:
+        """Listen for other workers' invalidations (after users_hub.start)."""
+        await users_hub.subscribe(INVALIDATE_CHANNEL, self._on_invalidate)
+
+    async def _on_invalidate(self, data: bytes) -> None:
+        self.drop(int(data))
+
+
+# Cross-worker user cache invalidations
+users_hub = RedisPubSubHub("users_hub")
+user_cache = UserCache(
+    max_size=settings.USER_CACHE_MAX,
+    ttl_s=settings.USER_CACHE_TTL_SECONDS,
+    settle_s=settings.USER_CACHE_SETTLE_SECONDS,
+)
+metrics.register_gauge("user_cache.size", lambda: len(user_cache))
@@ -0,0 +1,80 @@
+"""Walking distance/duration lookups backed by OSRM table requests and an in-process LRU cache.
+
+Points are snapped to a grid (WALK_CACHE_CELL_DEG) and the cell centers are what OSRM is asked about,
+so every cached value is exact for its (origin cell, destination cell) pair.
+"""
+from collections import OrderedDict
+
+from backend.config import settings
+from backend.services import metrics
+from backend.services.osrm import call_with_budget, get_walking_table
+
+Cell = tuple[int, int]
+Point = tuple[float, float]
+
+_cache: "OrderedDict[tuple[Cell, Cell], tuple[float, float] | None]" = OrderedDict()
+
+metrics.register_gauge("walk_times.cache_size", lambda: len(_cache))
+metrics.register_gauge("walk_times.cache_hit_rate", lambda: metrics.ratio("walk_times.cache_hits", "walk_times.lookups"))
+
+
+def snap(lat: float, lng: float) -> Cell:
+    """Grid cell containing (lat, lng)."""
+    size = settings.WALK_CACHE_CELL_DEG
+    return (round(lat / size), round(lng / size))
+
+
+def cell_center(cell: Cell) -> Point:
+    size = settings.WALK_CACHE_CELL_DEG
+    return (cell[0] * size, cell[1] * size)
+
+
+def cached(origin: Point, dest: Point) -> tuple[float, float] | None:
+    """Cached (distance_m, duration_s) for a pair, or None if unknown or unreachable. Never calls OSRM."""
+    key = (snap(*origin), snap(*dest))
+    value = _cache.get(key)
+    if value is not None:
+        _cache.move_to_end(key)
+    return value
+
+
+def _store(key: tuple[Cell, Cell], value: tuple[float, float] | None) -> None:
+    _cache[key] = value
+    _cache.move_to_end(key)
+    while len(_cache) > settings.WALK_CACHE_MAX_ENTRIES:
+        _cache.popitem(last=False)
+
+
+async def walking_pairs(pairs: list[tuple[Point, Point]], budget_s: float) -> list[tuple[float, float] | None]:
+    """
+    Return (distance_m, duration_s) for each (origin, dest) pair, None where OSRM found no route.
+    Cache misses are resolved with a single OSRM table request (all missing origin cells x destination cells).
+    Raises OsrmUnavailable if that request is short-circuited, fails or exceeds budget_s.
+    """
+    keys = [(snap(*o), snap(*d)) for o, d in pairs]
+    metrics.incr("walk_times.lookups", len(keys))
+    missing = [k for k in keys if k not in _cache]
+    metrics.incr("walk_times.cache_hits", len(keys) - len(missing))
+    if missing:
+        src_cells = list(dict.fromkeys(k[0] for k in missing))
+        dst_cells = list(dict.fromkeys(k[1] for k in missing))
+        distances, durations = await call_with_budget(
+            get_walking_table(
+                [cell_center(c) for c in src_cells],
+                [cell_center(c) for c in dst_cells],
+                base_url=settings.OSRM_BASE_URL,
+                timeout_s=budget_s,
+            ),
+            budget_s=budget_s,
+        )
+        for i, sc in enumerate(src_cells):
+            for j, dc in enumerate(dst_cells):
+                dist, dur = distances[i][j], durations[i][j]
+                _store((sc, dc), (float(dist), float(dur)) if dist is not None and dur is not None else None)
+    result = []
+    for k in keys:
+        value = _cache.get(k)
+        if k in _cache:
+            _cache.move_to_end(k)
+        result.append(value)
+    return result
@@ -1,45 +1,307 @@
-"""Connection manager for real-time WebSocket updates (sessions, intents). Avoids circular imports."""
+"""Connection manager for real-time WebSocket updates (sessions, intents). Avoids circular imports.
+
+With a broker hub attached (Redis pub/sub), notifications are published to the recipients' shard channels
+(user_id % UPDATES_SHARDS) and every worker delivers them to its own sockets. A worker subscribes only to the
+shards of users currently connected to it, so no worker sees every event.
+
+Local delivery never awaits the network: each socket has a bounded outbound queue drained by its own writer
+task. A socket whose queue overflows, or whose send stays blocked past UPDATES_SEND_TIMEOUT_SECONDS, is closed.
+
+Frames that reach a socket within UPDATES_COALESCE_WINDOW_MS of each other (bounded by
+UPDATES_COALESCE_MAX_DELAY_MS from the first) are sent as one {"type": "batch", "frames": [...]} message.
+
+Frames carry the changed object (see session_upsert / intent_upsert / *_delete) and a per-user "seq" (Redis
+INCR when brokered, so it is consistent across workers). Each message is serialized once; seq is spliced into
+the shared JSON per recipient. A client that sees a seq gap refetches its lists.
+"""
 import asyncio
 import json
-from typing import Set
+from typing import Iterable
 
 from fastapi import WebSocket
 
+from backend.config import settings
+from backend.schemas.intent import IntentResponse
+from backend.schemas.session import SessionResponse
+from backend.services import metrics, response_cache
+from backend.services.pubsub import RedisPubSubHub
+
+# Close code for evicted slow consumers ("try again later")
+SLOW_CONSUMER_CLOSE_CODE = 1013
+# Per-user sequence counters live this long after the last event
+SEQ_TTL_SECONDS = 24 * 3600
+
+
+def session_upsert(session: SessionResponse) -> dict:
+    return {"type": "sessions", "op": "upsert", "session": session.model_dump(mode="json")}
+
+
+def session_delete(session_id: int) -> dict:
+    return {"type": "sessions", "op": "delete", "session_id": session_id}
+
+
+def intent_upsert(intent: IntentResponse) -> dict:
+    return {"type": "intents", "op": "upsert", "intent": intent.model_dump(mode="json")}
+
+
+def intent_delete(intent_id: int) -> dict:
+    return {"type": "intents", "op": "delete", "intent_id": intent_id}
+
+
+def _stamp(body: str, seq: int) -> str:
+    """Insert "seq" into an already-serialized JSON object."""
+    return f'{{"seq":{seq}}}' if body == "{}" else f'{{"seq":{seq},{body[1:]}'
+
+
+def _evict_done(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        metrics.incr("updates.evict_errors")
+
+
+class _Connection:
+    """One socket with its outbound queue and writer task."""
+
+    def __init__(self, websocket: WebSocket, max_queue: int, updates: bool) -> None:
+        self.websocket = websocket
+        self.queue: asyncio.Queue[str] = asyncio.Queue(maxsize=max_queue)
+        self.writer: asyncio.Task | None = None
+        # Overflow eviction, scheduled from the non-async put path; kept so it is not collected mid-run
+        self.evictor: asyncio.Task | None = None
+        self.closed = False
+        # False for multiplexed sockets that have not sent a "sub" frame yet
+        self.updates = updates
+
 
 class UpdatesConnectionManager:
-    """Maps user_id -> set of WebSockets. Notify users when their sessions or intents change."""
+    """Maps user_id -> that user's sockets. Notify users when their sessions or intents change."""
 
-    def __init__(self) -> None:
-        self._connections: dict[int, Set[WebSocket]] = {}
+    def __init__(
+        self,
+        hub: RedisPubSubHub | None = None,
+        shards: int = 64,
+        max_queue: int = 64,
+        send_timeout_s: float = 5.0,
+        coalesce_window_s: float = 0.0,
+        coalesce_max_delay_s: float = 0.0,
+    ) -> None:
+        self._connections: dict[int, dict[WebSocket, _Connection]] = {}
+        self._hub = hub
+        self._shards = shards
+        self._shard_users: dict[int, int] = {}  # shard -> number of local users in it
+        self._max_queue = max_queue
+        self._send_timeout_s = send_timeout_s
+        self._coalesce_window_s = coalesce_window_s
+        self._coalesce_max_delay_s = coalesce_max_delay_s
+        self._local_seq: dict[int, int] = {}
 
-    def connect(self, user_id: int, websocket: WebSocket) -> None:
-        if user_id not in self._connections:
-            self._connections[user_id] = set()
-        self._connections[user_id].add(websocket)
+    def shard_of(self, user_id: int) -> int:
+        return user_id % self._shards
 
-    def disconnect(self, user_id: int, websocket: WebSocket) -> None:
-        if user_id in self._connections:
-            self._connections[user_id].discard(websocket)
-            if not self._connections[user_id]:
-                del self._connections[user_id]
+    def _channel(self, shard: int) -> str:
+        return f"updates:shard:{shard}"
 
-    async def notify_user(self, user_id: int, message: dict) -> None:
+    async def connect(self, user_id: int, websocket: WebSocket, updates: bool = True) -> None:
         if user_id not in self._connections:
+            self._connections[user_id] = {}
+            await self._local_user_added(user_id)
+        conn = _Connection(websocket, self._max_queue, updates)
+        conn.writer = asyncio.create_task(self._writer(user_id, conn))
+        self._connections[user_id][websocket] = conn
+
+    def set_updates(self, user_id: int, websocket: WebSocket, enabled: bool) -> None:
+        """Turn update-event delivery on or off for one socket (multiplexed sub/unsub)."""
+        conn = self._connections.get(user_id, {}).get(websocket)
+        if conn is not None:
+            conn.updates = enabled
+
+    def send(self, user_id: int, websocket: WebSocket, text: str) -> None:
+        """Queue an arbitrary frame on one socket through its writer (same backpressure rules as updates)."""
+        conn = self._connections.get(user_id, {}).get(websocket)
+        if conn is not None:
+            self._put(user_id, conn, text)
+
+    async def disconnect(self, user_id: int, websocket: WebSocket) -> None:
+        conns = self._connections.get(user_id)
+        if conns is None:
+            return
+        conn = conns.pop(websocket, None)
+        if conn is not None:
+            conn.closed = True
+            if conn.writer is not None and conn.writer is not asyncio.current_task():
+                conn.writer.cancel()
+        if not conns:
+            del self._connections[user_id]
+            await self._local_user_removed(user_id)
+
+    async def _local_user_added(self, user_id: int) -> None:
+        shard = self.shard_of(user_id)
+        self._shard_users[shard] = self._shard_users.get(shard, 0) + 1
+        if self._hub is not None and self._shard_users[shard] == 1:
+            await self._hub.subscribe(self._channel(shard), self._on_broker_message)
+
+    async def _local_user_removed(self, user_id: int) -> None:
+        shard = self.shard_of(user_id)
+        self._shard_users[shard] = self._shard_users.get(shard, 1) - 1
+        if self._shard_users[shard] <= 0:
+            del self._shard_users[shard]
+            if self._hub is not None:
+                await self._hub.unsubscribe(self._channel(shard), self._on_broker_message)
+
+    async def _on_broker_message(self, data: bytes) -> None:
+        envelope = json.loads(data)
+        for seqs, body in envelope["f"]:
+            for uid, seq in seqs.items():
+                self._enqueue_local(int(uid), _stamp(body, seq))
+
+    def _enqueue_local(self, user_id: int, text: str) -> None:
+        """Queue a frame on each of the user's sockets without waiting; evict sockets whose queue is full."""
+        for conn in list(self._connections.get(user_id, {}).values()):
+            if conn.updates:
+                self._put(user_id, conn, text)
+
+    def _put(self, user_id: int, conn: _Connection, text: str) -> None:
+        if conn.closed:
             return
-        text = json.dumps(message)
-        dead = set()
-        for ws in self._connections[user_id]:
+        try:
+            conn.queue.put_nowait(text)
+        except asyncio.QueueFull:
+            metrics.incr("updates.frames_dropped")
+            if conn.evictor is None:
+                metrics.incr("updates.evicted_overflow")
+                conn.evictor = asyncio.create_task(self._evict(user_id, conn))
+                conn.evictor.add_done_callback(_evict_done)
+
+    async def _next_frame(self, conn: _Connection) -> str:
+        """Wait for the next frame; merge anything arriving within the coalescing window into one batch."""
+        batch = [await conn.queue.get()]
+        if self._coalesce_window_s > 0:
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + max(self._coalesce_max_delay_s, self._coalesce_window_s)
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                await asyncio.sleep(min(self._coalesce_window_s, remaining))
+                arrived = 0
+                while not conn.queue.empty():
+                    batch.append(conn.queue.get_nowait())
+                    arrived += 1
+                if not arrived:
+                    break
+        if len(batch) == 1:
+            return batch[0]
+        # Frames saved: len(batch) frames went out as one
+        metrics.incr("updates.frames_coalesced", len(batch) - 1)
+        return '{"type":"batch","frames":[' + ",".join(batch) + "]}"
+
+    async def _writer(self, user_id: int, conn: _Connection) -> None:
+        while not conn.closed:
+            text = await self._next_frame(conn)
             try:
-                await ws.send_text(text)
+                await asyncio.wait_for(conn.websocket.send_text(text), timeout=self._send_timeout_s)
+            except asyncio.TimeoutError:
+                metrics.incr("updates.evicted_timeout")
+                await self._evict(user_id, conn)
+                return
             except Exception:
-                dead.add(ws)
-        for ws in dead:
-            self._connections[user_id].discard(ws)
-        if user_id in self._connections and not self._connections[user_id]:
-            del self._connections[user_id]
+                await self.disconnect(user_id, conn.websocket)
+                return
+            metrics.incr("updates.frames_sent")
+
+    async def _evict(self, user_id: int, conn: _Connection) -> None:
+        if conn.closed:
+            return
+        metrics.incr("updates.frames_dropped", conn.queue.qsize())
+        await self.disconnect(user_id, conn.websocket)
+        try:
+            await conn.websocket.close(code=SLOW_CONSUMER_CLOSE_CODE)
+        except Exception:
+            pass
+
+    def queue_depths(self) -> list[int]:
+        return [c.queue.qsize() for conns in self._connections.values() for c in conns.values()]
+
+    async def notify_user(self, user_id: int, message: dict) -> None:
+        await self.notify_many([([user_id], message)])
+
+    async def notify_users(self, user_ids: Iterable[int], message: dict) -> None:
+        await self.notify_many([(user_ids, message)])
+
+    async def notify_many(self, frames: list[tuple[Iterable[int], dict]]) -> None:
+        """
+        Send several messages, each to its own recipients, serializing each message once. Recipients of
+        "sessions" / "intents" frames also lose their cached list (services/response_cache).
+        """
+        frames = [(list(uids), message) for uids, message in frames]
+        await response_cache.invalidate(
+            (message["type"], uid)
+            for uids, message in frames
+            if message.get("type") in response_cache.KINDS
+            for uid in uids
+        )
+        bodies = [(sorted(set(uids)), json.dumps(message)) for uids, message in frames]
+        bodies = [(uids, body) for uids, body in bodies if uids]
+        if not bodies:
+            return
+        counts: dict[int, int] = {}
+        for uids, _ in bodies:
+            for uid in uids:
+                counts[uid] = counts.get(uid, 0) + 1
+        brokered = self._hub is not None and self._hub.started
+        last = await self._reserve_seqs(counts) if brokered else self._reserve_local_seqs(counts)
+        # Hand out each user's reserved range in frame order
+        next_seq = {uid: last[uid] - n + 1 for uid, n in counts.items()}
+        stamped: list[tuple[dict[int, int], str]] = []
+        for uids, body in bodies:
+            seqs = {}
+            for uid in uids:
+                seqs[uid] = next_seq[uid]
+                next_seq[uid] += 1
+            stamped.append((seqs, body))
+        if not brokered:
+            for seqs, body in stamped:
+                for uid, seq in seqs.items():
+                    self._enqueue_local(uid, _stamp(body, seq))
+            return
+        by_shard: dict[int, list[tuple[dict[int, int], str]]] = {}
+        for seqs, body in stamped:
+            for uid, seq in seqs.items():
+                frames_for_shard = by_shard.setdefault(self.shard_of(uid), [])
+                if frames_for_shard and frames_for_shard[-1][1] is body:
+                    frames_for_shard[-1][0][uid] = seq
+                else:
+                    frames_for_shard.append(({uid: seq}, body))
+        metrics.incr("updates.published", len(by_shard))
+        await self._hub.publish_many(
+            [(self._channel(shard), json.dumps({"f": fs})) for shard, fs in by_shard.items()]
+        )
+
+    def _reserve_local_seqs(self, counts: dict[int, int]) -> dict[int, int]:
+        for uid, n in counts.items():
+            self._local_seq[uid] = self._local_seq.get(uid, 0) + n
+        return {uid: self._local_seq[uid] for uid in counts}
 
-    async def notify_users(self, user_ids: list[int], message: dict) -> None:
-        await asyncio.gather(*[self.notify_user(uid, message) for uid in user_ids])
+    async def _reserve_seqs(self, counts: dict[int, int]) -> dict[int, int]:
+        """INCRBY each user's Redis counter in one pipelined round-trip; returns the last reserved seq per user."""
+        uids = list(counts)
+        async with self._hub.redis.pipeline(transaction=False) as pipe:
+            for uid in uids:
+                pipe.incrby(f"updates:seq:{uid}", counts[uid])
+                pipe.expire(f"updates:seq:{uid}", SEQ_TTL_SECONDS)
+            results = await pipe.execute()
+        return {uid: int(results[2 * i]) for i, uid in enumerate(uids)}
 
 
-updates_manager = UpdatesConnectionManager()
+updates_hub = RedisPubSubHub("updates_hub")
+updates_manager = UpdatesConnectionManager(
+    hub=updates_hub if settings.UPDATES_BROKER == "redis" else None,
+    shards=settings.UPDATES_SHARDS,
+    max_queue=settings.UPDATES_QUEUE_MAX,
+    send_timeout_s=settings.UPDATES_SEND_TIMEOUT_SECONDS,
+    coalesce_window_s=settings.UPDATES_COALESCE_WINDOW_MS / 1000.0,
+    coalesce_max_delay_s=settings.UPDATES_COALESCE_MAX_DELAY_MS / 1000.0,
+)
+metrics.register_gauge("updates.local_users", lambda: len(updates_manager._connections))
+metrics.register_gauge("updates.subscribed_shards", lambda: len(updates_manager._shard_users))
+metrics.register_gauge("updates.queue_depth_total", lambda: sum(updates_manager.queue_depths()))
+metrics.register_gauge("updates.queue_depth_max", lambda: max(updates_manager.queue_depths(), default=0))
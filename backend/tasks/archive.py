@@ -0,0 +1,152 @@
+"""Move finished sessions and expired intents out of the hot tables into the monthly-partitioned archive.
+
+Each run (a leader-elected job, see tasks/runner):
+  1. creates the archive partitions the rows about to move need, plus next month's;
+  2. moves terminal sessions older than ARCHIVE_SESSIONS_AFTER_HOURS (their ratings stay hot for the
+     matcher) and then expired intents no session still points at, in batches of ARCHIVE_BATCH_SIZE until
+     a short one, each batch one transaction running a DELETE ... RETURNING feeding an INSERT, so a row is
+     never in both places or neither;
+  3. detaches archive partitions older than ARCHIVE_RETENTION_MONTHS into the ARCHIVE_COLD_SCHEMA schema,
+     as standalone tables that can be dumped, moved to cheaper storage or dropped.
+"""
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from backend.config import settings
+from backend.database import engine
+from backend.models.archive import IntentArchive, SessionArchive
+from backend.services import metrics
+
+_SESSION_COLUMNS = ", ".join(c.name for c in SessionArchive.__table__.columns)
+_INTENT_COLUMNS = ", ".join(c.name for c in IntentArchive.__table__.columns)
+
+# Rows to move, as "FROM <hot table> t WHERE ..."
+_SESSION_CANDIDATES = """
+    FROM sessions t
+    WHERE t.state IN ('COMPLETED', 'ABORTED') AND t.created_at < :cutoff
+"""
+_INTENT_CANDIDATES = """
+    FROM intents t
+    WHERE t.expires_at < :cutoff
+      AND NOT EXISTS (SELECT 1 FROM sessions s WHERE s.intent_a_id = t.id)
+      AND NOT EXISTS (SELECT 1 FROM sessions s WHERE s.intent_b_id = t.id)
+"""
+
+
+def _month_start(d: date) -> date:
+    return d.replace(day=1)
+
+
+def _next_month(d: date) -> date:
+    return (d.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_{month.year:04d}_{month.month:02d}"
+
+
+async def ensure_partitions(conn: AsyncConnection, table: str, first: date, last: date) -> None:
+    """
+    Create monthly partitions of table covering first..last (inclusive, by month). Bounds are UTC midnights,
+    whatever the server's TimeZone, to match the UTC months rows are selected by.
+    """
+    month = _month_start(first)
+    while month <= last:
+        end = _next_month(month)
+        await conn.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS {partition_name(table, month)} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') TO ('{end.isoformat()} 00:00:00+00')"
+            )
+        )
+        month = end
+
+
+async def detach_old_partitions(conn: AsyncConnection, table: str, before: date) -> list[str]:
+    """
+    Detach partitions whose month ends on or before `before` into the cold schema (merging into an earlier
+    detached table of the same month if there is one); returns their names.
+    """
+    cold = settings.ARCHIVE_COLD_SCHEMA
+    await conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {cold}"))
+    result = await conn.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = CAST(:table AS regclass)"
+        ),
+        {"table": table},
+    )
+    detached = []
+    for (name,) in result.all():
+        try:
+            year, month = int(name[-7:-3]), int(name[-2:])
+        except ValueError:
+            continue
+        if _next_month(date(year, month, 1)) > before:
+            continue
+        await conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+        if (await conn.execute(text("SELECT to_regclass(:t)"), {"t": f"{cold}.{name}"})).scalar() is None:
+            await conn.execute(text(f"ALTER TABLE {name} SET SCHEMA {cold}"))
+        else:
+            await conn.execute(text(f"INSERT INTO {cold}.{name} SELECT * FROM {name}"))
+            await conn.execute(text(f"DROP TABLE {name}"))
+        detached.append(name)
+    return detached
+
+
+async def _move_batch(
+    conn: AsyncConnection, source: str, target: str, columns: str, candidates: str, cutoff: datetime
+) -> int:
+    oldest = (await conn.execute(text(f"SELECT min(t.created_at) {candidates}"), {"cutoff": cutoff})).scalar()
+    if oldest is None:
+        return 0
+    await ensure_partitions(conn, target, oldest.date(), _next_month(datetime.now(timezone.utc).date()))
+    result = await conn.execute(
+        text(
+            f"WITH moved AS ("
+            f"  DELETE FROM {source} WHERE id IN ("
+            f"    SELECT t.id {candidates} ORDER BY t.id LIMIT :batch FOR UPDATE SKIP LOCKED"
+            f"  ) RETURNING {columns}"
+            f") INSERT INTO {target} ({columns}) SELECT {columns} FROM moved"
+        ),
+        {"cutoff": cutoff, "batch": settings.ARCHIVE_BATCH_SIZE},
+    )
+    return result.rowcount
+
+
+async def _move(source: str, target: str, columns: str, candidates: str, cutoff: datetime) -> int:
+    """Move every candidate row, one transaction per batch, until a batch comes back short; returns the total."""
+    total = 0
+    while True:
+        async with engine.begin() as conn:
+            moved = await _move_batch(conn, source, target, columns, candidates, cutoff)
+        total += moved
+        if moved < settings.ARCHIVE_BATCH_SIZE:
+            return total
+
+
+async def run_archive_once() -> dict[str, int]:
+    """One archival pass; returns rows moved and partitions detached."""
+    now = datetime.now(timezone.utc)
+    sessions = await _move(
+        "sessions", "sessions_archive", _SESSION_COLUMNS, _SESSION_CANDIDATES,
+        now - timedelta(hours=settings.ARCHIVE_SESSIONS_AFTER_HOURS),
+    )
+    intents = await _move(
+        "intents", "intents_archive", _INTENT_COLUMNS, _INTENT_CANDIDATES,
+        now - timedelta(minutes=settings.ARCHIVE_INTENTS_AFTER_MINUTES),
+    )
+    keep_from = _month_start(now.date())
+    for _ in range(settings.ARCHIVE_RETENTION_MONTHS):
+        keep_from = _month_start(keep_from - timedelta(days=1))
+    detached = []
+    async with engine.begin() as conn:
+        for table in ("sessions_archive", "intents_archive"):
+            await ensure_partitions(conn, table, now.date(), _next_month(now.date()))
+            detached += await detach_old_partitions(conn, table, keep_from)
+    metrics.incr("archive.sessions_moved", sessions)
+    metrics.incr("archive.intents_moved", intents)
+    metrics.incr("archive.partitions_detached", len(detached))
+    return {"sessions": sessions, "intents": intents, "detached": len(detached)}
@@ -1,35 +1,62 @@
-"""Auto-end ACTIVE sessions by time limit."""
-import asyncio
-from datetime import datetime, timedelta, timezone
+"""Auto-end ACTIVE sessions by time limit, driven by the Redis deadline set (services/deadlines).
 
-from sqlalchemy import select, update
-from sqlalchemy.ext.asyncio import AsyncSession
+Both run as leader-elected jobs (tasks/runner). Each tick claims the sessions whose deadline has passed and completes them with one batched UPDATE, then
+pushes the deletes to both parties over /ws/updates. A reconciliation pass (at startup, then periodically)
+re-adds every ACTIVE session's deadline from the table, so nothing is missed across restarts or Redis loss.
+"""
+import time
+
+from sqlalchemy import func, select, update
 
 from backend.database import async_session
 from backend.models.session import Session, SessionState
+from backend.redis_client import get_redis
+from backend.services import metrics
+from backend.services.deadlines import claim_due, planned_end, schedule_many
+from backend.services.eta import eta_service
+from backend.services.geofence import geofence_service
+from backend.services.location_store import clear_sessions
+from backend.services.ws_updates import session_delete, updates_manager
+
 
-CHECK_INTERVAL_SECONDS = 60
+async def run_auto_end_once() -> int:
+    """Complete every session whose deadline has passed; returns how many were ended."""
+    redis = await get_redis()
+    now = time.time()
+    session_ids = await claim_due(redis, now)
+    if not session_ids:
+        return 0
+    try:
+        async with async_session() as db:
+            result = await db.execute(
+                update(Session)
+                .where(Session.id.in_(session_ids), Session.state == SessionState.ACTIVE)
+                .values(state=SessionState.COMPLETED)
+                .returning(Session.id, Session.user_a_id, Session.user_b_id, Session.sos_at)
+            )
+            ended = result.all()
+            await db.commit()
+    except Exception:
+        # Put the claims back so the next tick retries them
+        await schedule_many(redis, {sid: now for sid in session_ids})
+        raise
+    for sid, _, _, _ in ended:
+        eta_service.drop(sid)
+        geofence_service.drop(sid)
+    await clear_sessions(redis, [sid for sid, _, _, _ in ended], [sid for sid, _, _, sos_at in ended if sos_at])
+    await updates_manager.notify_many([([a, b], session_delete(sid)) for sid, a, b, _ in ended])
+    metrics.incr("auto_end.ended", len(ended))
+    return len(ended)
 
 
-async def run_auto_end_once() -> None:
-    now = datetime.now(timezone.utc)
+async def reconcile_deadlines() -> int:
+    """Schedule the deadline of every ACTIVE session (idempotent); returns how many were written."""
     async with async_session() as db:
         result = await db.execute(
-            select(Session).where(Session.state == SessionState.ACTIVE)
+            select(Session.id, func.coalesce(Session.ends_at, planned_end(Session.started_at))).where(
+                Session.state == SessionState.ACTIVE, Session.started_at.is_not(None)
+            )
         )
-        sessions = result.scalars().all()
-        for session in sessions:
-            if session.started_at:
-                ends = session.started_at + timedelta(minutes=session.max_duration_minutes)
-                if now >= ends:
-                    await db.execute(update(Session).where(Session.id == session.id).values(state=SessionState.COMPLETED))
-        await db.commit()
-
-
-async def run_auto_end_loop() -> None:
-    while True:
-        try:
-            await run_auto_end_once()
-        except Exception:
-            pass
-        await asyncio.sleep(CHECK_INTERVAL_SECONDS)
+        deadlines = {sid: ends_at.timestamp() for sid, ends_at in result.all()}
+    await schedule_many(await get_redis(), deadlines)
+    return len(deadlines)
@@ -0,0 +1,145 @@
+"""Periodic background jobs that run on exactly one worker across the cluster.
+
+Workers compete for a Redis lease (SET NX PX on LEASE_KEY, renewed with WATCH/MULTI while still the owner);
+only the holder runs jobs. A leader that cannot renew before the lease expires stops running jobs, and
+another worker takes over within one lease TTL. Each job sleeps its interval plus random jitter between
+runs, and records run count, failures and run time in metrics.
+"""
+import asyncio
+import logging
+import random
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+from redis.exceptions import WatchError
+
+from backend.config import settings
+from backend.services import metrics
+
+logger = logging.getLogger(__name__)
+
+LEASE_KEY = "jobs:leader"
+
+
+@dataclass
+class Job:
+    name: str
+    fn: Callable[[], Awaitable[Any]]
+    interval_s: float
+    jitter_s: float
+    last_runtime_ms: float = 0.0
+
+
+class JobRunner:
+    def __init__(self, lease_ttl_s: float, jitter_fraction: float) -> None:
+        self.instance_id = uuid.uuid4().hex
+        self._lease_ttl_s = lease_ttl_s
+        self._jitter_fraction = jitter_fraction
+        self._jobs: list[Job] = []
+        self._redis: Any = None
+        self._tasks: list[asyncio.Task] = []
+        self._running = False
+        self._lease_until = 0.0
+        metrics.register_gauge("jobs.leader", lambda: int(self.is_leader))
+
+    @property
+    def is_leader(self) -> bool:
+        return self._running and time.monotonic() < self._lease_until
+
+    def add(self, name: str, fn: Callable[[], Awaitable[Any]], interval_s: float) -> None:
+        job = Job(name, fn, interval_s, interval_s * self._jitter_fraction)
+        self._jobs.append(job)
+        metrics.register_gauge(f"jobs.{name}.last_runtime_ms", lambda: round(job.last_runtime_ms, 1))
+
+    async def start(self, redis: Any) -> None:
+        self._redis = redis
+        self._running = True
+        self._tasks = [asyncio.create_task(self._lease_loop())]
+        self._tasks += [asyncio.create_task(self._job_loop(job)) for job in self._jobs]
+
+    async def stop(self) -> None:
+        self._running = False
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._lease_until:
+            self._lease_until = 0.0
+            try:
+                await self._release()
+            except Exception:
+                logger.exception("releasing job lease failed")
+
+    async def _lease_loop(self) -> None:
+        while self._running:
+            started = time.monotonic()
+            try:
+                if await self._acquire_or_renew():
+                    self._lease_until = started + self._lease_ttl_s
+                else:
+                    self._lease_until = 0.0
+            except Exception:
+                metrics.incr("jobs.lease_errors")
+                logger.exception("job lease renewal failed")
+            await asyncio.sleep(self._lease_ttl_s / 3)
+
+    async def _acquire_or_renew(self) -> bool:
+        ttl_ms = int(self._lease_ttl_s * 1000)
+        if await self._redis.set(LEASE_KEY, self.instance_id, nx=True, px=ttl_ms):
+            metrics.incr("jobs.lease_acquired")
+            return True
+        async with self._redis.pipeline(transaction=True) as pipe:
+            try:
+                await pipe.watch(LEASE_KEY)
+                if not self._owns(await pipe.get(LEASE_KEY)):
+                    return False
+                pipe.multi()
+                pipe.pexpire(LEASE_KEY, ttl_ms)
+                await pipe.execute()
+                return True
+            except WatchError:
+                return False
+
+    async def _release(self) -> None:
+        async with self._redis.pipeline(transaction=True) as pipe:
+            try:
+                await pipe.watch(LEASE_KEY)
+                if self._owns(await pipe.get(LEASE_KEY)):
+                    pipe.multi()
+                    pipe.delete(LEASE_KEY)
+                    await pipe.execute()
+            except WatchError:
+                pass
+
+    def _owns(self, value: Any) -> bool:
+        if isinstance(value, bytes):
+            value = value.decode()
+        return value == self.instance_id
+
+    async def _job_loop(self, job: Job) -> None:
+        while self._running:
+            if self.is_leader:
+                await self._run(job)
+                delay = job.interval_s
+            else:
+                delay = min(job.interval_s, self._lease_ttl_s / 3)
+            await asyncio.sleep(delay + random.uniform(0, job.jitter_s))
+
+    async def _run(self, job: Job) -> None:
+        start = time.perf_counter()
+        try:
+            await job.fn()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            metrics.incr(f"jobs.{job.name}.failures")
+            logger.exception("job %s failed", job.name)
+        finally:
+            job.last_runtime_ms = (time.perf_counter() - start) * 1000
+            metrics.incr(f"jobs.{job.name}.runs")
+            metrics.incr(f"jobs.{job.name}.runtime_ms", job.last_runtime_ms)
+
+
+job_runner = JobRunner(lease_ttl_s=settings.JOBS_LEASE_TTL_SECONDS, jitter_fraction=settings.JOBS_JITTER_FRACTION)
@@ -212,21 +212,71 @@ runWhenReady(function () {
     }
   }
 
+  // One multiplexed socket (/ws/mux) carries update events and live session locations
   var updatesWs = null;
   var updatesWsReconnectTimer = null;
+  var muxJoined = {}; // session id -> location frame handler
+  function muxSend(frame) {
+    if (updatesWs && updatesWs.readyState === WebSocket.OPEN) updatesWs.send(JSON.stringify(frame));
+  }
+  window.mux = {
+    join: function (sessionId, onLocation) {
+      muxJoined[sessionId] = onLocation;
+      muxSend({ op: "join", s: sessionId });
+    },
+    leave: function (sessionId) {
+      if (!(sessionId in muxJoined)) return;
+      delete muxJoined[sessionId];
+      muxSend({ op: "leave", s: sessionId });
+    },
+    loc: function (sessionId, lat, lng) {
+      muxSend({ op: "loc", s: sessionId, lat: lat, lng: lng });
+    },
+  };
   function startUpdatesWS() {
     if (updatesWs && updatesWs.readyState === WebSocket.OPEN) return;
     var t = token || (typeof localStorage !== "undefined" ? localStorage.getItem("token") : null);
     if (!t) return;
     var protocol = window.location.protocol === "https:" ? "wss:" : "ws:";
-    var url = protocol + "//" + window.location.host + "/ws/updates?token=" + encodeURIComponent(t);
+    var url = protocol + "//" + window.location.host + "/ws/mux?token=" + encodeURIComponent(t);
     try {
       updatesWs = new WebSocket(url);
+      var lastSeq = null;
+      updatesWs.onopen = function () {
+        muxSend({ op: "sub" });
+        Object.keys(muxJoined).forEach(function (sid) {
+          muxSend({ op: "join", s: Number(sid) });
+        });
+        // Anything may have changed while disconnected
+        refreshIntents();
+        refreshSessions();
+      };
+      var handleUpdate = function (msg) {
+        if (msg.type === "batch") {
+          (msg.frames || []).forEach(handleUpdate);
+          return;
+        }
+        if (msg.type === "location") {
+          var onLocation = muxJoined[msg.session_id];
+          if (onLocation) onLocation(msg);
+          return;
+        }
+        if (msg.type === "ack" || msg.type === "error") return;
+        var gap = lastSeq != null && msg.seq != null && msg.seq !== lastSeq + 1;
+        if (msg.seq != null) lastSeq = msg.seq;
+        if (gap) {
+          refreshIntents();
+          refreshSessions();
+          return;
+        }
+        if (msg.type === "sessions") applySessionDelta(msg);
+        else if (msg.type === "intents") applyIntentDelta(msg);
+        else if (msg.type === "eta") showSessionEta(msg);
+        else if (msg.type === "geofence") showGeofenceEvent(msg);
+      };
       updatesWs.onmessage = function (event) {
         try {
-          var msg = JSON.parse(event.data);
-          if (msg.type === "sessions") refreshSessions();
-          else if (msg.type === "intents") refreshIntents();
+          handleUpdate(JSON.parse(event.data));
         } catch (e) {}
       };
       updatesWs.onclose = function () {
@@ -438,7 +488,7 @@ runWhenReady(function () {
         }
         var g = res.d;
         var steps = (g.steps || []).slice(0, 12);
-        var meta = fmtM(g.distance_m) + " · " + fmtMin(g.duration_s);
+        var meta = fmtM(g.distance_m) + " · " + fmtMin(g.duration_s) + (g.approximate ? " (approx., straight line)" : "");
         var list = steps.map(function (s) {
           return "<li>" + escapeHtml(s.instruction || "Continue") + " <span class=\"sidebar-hint\">(" + fmtM(s.distance_m) + ")</span></li>";
         }).join("");
@@ -496,13 +546,53 @@ runWhenReady(function () {
       });
   });
 
+  var intentsCache = [];
+  var sessionsCache = [];
+
+  // Apply a pushed { op: "upsert"|"delete" } frame; frames without op (older servers) mean "refetch"
+  function applyIntentDelta(msg) {
+    if (msg.op === "upsert" && msg.intent) {
+      intentsCache = [msg.intent].concat(intentsCache.filter(function (i) { return i.id !== msg.intent.id; }));
+      renderIntents(intentsCache);
+    } else if (msg.op === "delete") {
+      intentsCache = intentsCache.filter(function (i) { return i.id !== msg.intent_id; });
+      renderIntents(intentsCache);
+    } else {
+      refreshIntents();
+    }
+  }
+
+  function applySessionDelta(msg) {
+    if (msg.op === "upsert" && msg.session) {
+      var incoming = msg.session;
+      var prev = sessionsCache.find(function (x) { return x.id === incoming.id; });
+      // Transition frames omit route points; keep the ones we already have
+      if (prev) {
+        ["route_a", "route_b", "meeting_point"].forEach(function (k) {
+          if (incoming[k] == null) incoming[k] = prev[k];
+        });
+      }
+      sessionsCache = [incoming].concat(sessionsCache.filter(function (x) { return x.id !== incoming.id; }));
+      renderSessions(sessionsCache);
+    } else if (msg.op === "delete") {
+      sessionsCache = sessionsCache.filter(function (x) { return x.id !== msg.session_id; });
+      renderSessions(sessionsCache);
+    } else {
+      refreshSessions();
+    }
+  }
+
   async function refreshIntents() {
     var res = await fetch(API + "/intents", { headers: headers() });
     if (!res.ok) {
       if (res.status === 401) { token = null; localStorage.removeItem("token"); setLoggedIn(false); }
       return;
     }
-    var list = await res.json();
+    intentsCache = await res.json();
+    renderIntents(intentsCache);
+  }
+
+  function renderIntents(list) {
     var sel = document.getElementById("match-intent-select");
     sel.innerHTML = "<option value=''>Select intent</option>";
     list.forEach(function (i) {
@@ -613,7 +703,11 @@ runWhenReady(function () {
       if (res.status === 401) { token = null; localStorage.removeItem("token"); setLoggedIn(false); }
       return;
     }
-    var list = await res.json();
+    sessionsCache = await res.json();
+    renderSessions(sessionsCache);
+  }
+
+  function renderSessions(list) {
     var div = document.getElementById("sessions-list");
     var html = "";
     list.forEach(function (s) {
@@ -624,7 +718,9 @@ runWhenReady(function () {
       }
       if (s.state === "ACCEPTED") btns = "<button type=\"button\" class=\"btn btn-sm\" data-id=\"" + s.id + "\" data-action=\"activate\">Activate</button> <button type=\"button\" class=\"btn btn-sm btn-danger\" data-id=\"" + s.id + "\" data-action=\"abort\">Abort</button>";
       if (s.state === "ACTIVE") btns = "<button type=\"button\" class=\"btn btn-sm\" data-id=\"" + s.id + "\" data-action=\"complete\">Complete</button> <button type=\"button\" class=\"btn btn-sm btn-danger\" data-id=\"" + s.id + "\" data-action=\"abort\">Abort</button> <button type=\"button\" class=\"btn btn-sm btn-sos\" data-id=\"" + s.id + "\" data-action=\"sos\">SOS</button>";
-      html += "<div class=\"session-card\"><span class=\"state state-" + s.state.toLowerCase() + "\">" + s.state + "</span> Session #" + s.id + (s.sos_at ? " <strong class=\"sos-tag\">SOS</strong>" : "") + " " + btns + "</div>";
+      var etaSpan = s.state === "ACTIVE" ? " <span class=\"sidebar-hint\" id=\"session-eta-" + s.id + "\" data-side=\"" + (s.my_side || "") + "\"></span>" : "";
+      if (s.state === "ACTIVE") etaSpan += " <span class=\"sidebar-hint\" id=\"session-geo-" + s.id + "\" data-side=\"" + (s.my_side || "") + "\"></span>";
+      html += "<div class=\"session-card\"><span class=\"state state-" + s.state.toLowerCase() + "\">" + s.state + "</span> Session #" + s.id + (s.sos_at ? " <strong class=\"sos-tag\">SOS</strong>" : "") + etaSpan + " " + btns + "</div>";
     });
     div.innerHTML = html || "None";
     div.querySelectorAll("[data-action]").forEach(function (btn) {
@@ -634,12 +730,13 @@ runWhenReady(function () {
     });
     document.getElementById("sos-banner").classList.toggle("hidden", !list.some(function (s) { return s.sos_at; }));
     var withRoutes = list.find(function (s) { return s.route_a && s.route_b; });
-    if (withRoutes && window.showSessionRoutes) showSessionRoutes(withRoutes.route_a, withRoutes.route_b, withRoutes.my_side);
+    if (withRoutes && window.showSessionRoutes) showSessionRoutes(withRoutes.route_a, withRoutes.route_b, withRoutes.my_side, withRoutes.meeting_point);
     else if (window.clearSessionRoutes) clearSessionRoutes();
     list.forEach(function (s) {
       if (s.state === "ACTIVE" && s.my_token && window.startLocationStream) startLocationStream(s.id, s.my_token, s.my_side);
     });
     var hasActive = list.some(function (s) { return s.state === "ACTIVE"; });
+    if (!hasActive && window.stopLocationStream) stopLocationStream();
     window.mapTweaksDisabled = hasActive;
     var useLocBtn = document.getElementById("use-my-location");
     if (useLocBtn) {
@@ -648,6 +745,37 @@ runWhenReady(function () {
     }
   }
 
+  function showGeofenceEvent(msg) {
+    var el = document.getElementById("session-geo-" + msg.session_id);
+    if (!el) return;
+    var who = msg.party === el.dataset.side ? "You" : "Peer";
+    var where = msg.fence === "meeting_point" ? "the meeting point" : "the destination";
+    var text = {
+      arrived: who + " reached " + where,
+      departed: who + " left " + where,
+      diverging: who + (who === "You" ? " are" : " is") + " heading away from " + where,
+    }[msg.event];
+    if (text) el.textContent = text;
+  }
+
+  // Latest ETA per session and side: a frame may carry only one side, so merge instead of replacing
+  var etaBySession = {};
+
+  function showSessionEta(msg) {
+    var el = document.getElementById("session-eta-" + msg.session_id);
+    if (!el || !msg.eta) return;
+    var eta = etaBySession[msg.session_id] = Object.assign(etaBySession[msg.session_id] || {}, msg.eta);
+    var mySide = el.dataset.side;
+    var peerSide = mySide === "a" ? "b" : "a";
+    var parts = [];
+    var mine = eta[mySide];
+    var peer = eta[peerSide];
+    var label = function (e) { return e.target === "meeting_point" ? "to meeting point" : "to destination"; };
+    if (mine && mine.eta_s != null) parts.push("You: " + fmtMin(mine.eta_s) + " " + label(mine));
+    if (peer && peer.eta_s != null) parts.push("Peer: " + fmtMin(peer.eta_s) + " " + label(peer));
+    el.textContent = parts.join(" · ");
+  }
+
   document.getElementById("refresh-sessions").addEventListener("click", refreshSessions);
 
   function sessionAction(sessionId, action) {
@@ -672,11 +800,11 @@ runWhenReady(function () {
     if (origin && window.setUserRoute) setUserRoute(origin, destination);
     updateSubmitIntentDisabled();
     refreshWalkGuidance();
-    var url = "https://nominatim.openstreetmap.org/reverse?lat=" + encodeURIComponent(lat) + "&lon=" + encodeURIComponent(lng) + "&format=json";
-    fetch(url, { headers: { "Accept": "application/json", "Accept-Language": "en", "User-Agent": "LastMile-Connect/1.0" } })
-      .then(function (r) { return r.json(); })
+    var url = API + "/geocode/reverse?lat=" + encodeURIComponent(lat) + "&lng=" + encodeURIComponent(lng);
+    fetch(url, { headers: { "Accept": "application/json" } })
+      .then(function (r) { return r.ok ? r.json() : null; })
       .then(function (data) {
-        var name = (data && data.display_name) ? data.display_name : (lat.toFixed(4) + ", " + lng.toFixed(4));
+        var name = (data && data.name) ? data.name : (lat.toFixed(4) + ", " + lng.toFixed(4));
         if (destStatus) destStatus.textContent = "Destination: " + name;
         if (window.updateDestMarkerPopup) window.updateDestMarkerPopup(name);
       })
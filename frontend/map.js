@@ -34,6 +34,13 @@ var peerEndIcon = L.divIcon({
   iconAnchor: [16, 16],
 });
 
+var meetIcon = L.divIcon({
+  className: "map-marker map-marker-meet",
+  html: "<span>Meet</span>",
+  iconSize: [32, 32],
+  iconAnchor: [16, 16],
+});
+
 function initMap() {
   if (map) return;
   var container = document.getElementById("map-container");
@@ -172,7 +179,7 @@ function clearSessionRoutes() {
   sessionRouteLayers = [];
 }
 
-function showSessionRoutes(routeA, routeB, mySide) {
+function showSessionRoutes(routeA, routeB, mySide, meetingPoint) {
   clearSessionRoutes();
   if (!map) return;
   var myColor = "#2563eb";
@@ -203,6 +210,12 @@ function showSessionRoutes(routeA, routeB, mySide) {
     var endB = L.marker([routeB.destination.lat, routeB.destination.lng], { icon: mySide === "b" ? endIcon : peerEndIcon }).addTo(map).bindPopup(mySide === "b" ? "End (you)" : "Peer end");
     sessionRouteLayers.push(startB, endB);
   }
+  if (meetingPoint) {
+    var meetMarker = L.marker([meetingPoint.lat, meetingPoint.lng], { icon: meetIcon })
+      .addTo(map)
+      .bindPopup("Meet here" + (meetingPoint.name ? ": " + meetingPoint.name : ""));
+    sessionRouteLayers.push(meetMarker);
+  }
   if (sessionRouteLayers.length) {
     var bounds = [];
     sessionRouteLayers.forEach(function (lyr) {
@@ -350,61 +363,68 @@ window.showBusStopMode = showBusStopMode;
 window.clearBusStopMode = clearBusStopMode;
 
 let ws = null;
-let locationPollTimer = null;
+let wsSessionId = null;
+let locationSendTimer = null;
+
+function showPartyLocation(side, lat, lng, mySide) {
+  if (!map || lat == null || lng == null) return;
+  if (peerMarkers[side]) map.removeLayer(peerMarkers[side]);
+  peerMarkers[side] = L.marker([lat, lng])
+    .addTo(map)
+    .bindPopup(side === mySide ? "You" : "Peer");
+}
 
 function startLocationStream(sessionId, token, mySide) {
+  if (wsSessionId === sessionId && (ws || window.mux)) return;
   stopLocationStream();
+  wsSessionId = sessionId;
+
+  // Server pushes { type: "location", party, lat, lng } for both parties as fixes arrive
+  var seen = {};
+  var fitted = false;
+  const onLocation = (msg) => {
+    showPartyLocation(msg.party, msg.lat, msg.lng, mySide);
+    seen[msg.party] = true;
+    if (!fitted && seen.a && seen.b) {
+      fitted = true;
+      setTimeout(function () {
+        if (window.fitMapToShowBothParties) fitMapToShowBothParties();
+      }, 100);
+    }
+  };
+  const startSending = (publish) => {
+    if (!navigator.geolocation) return;
+    const send = () => {
+      navigator.geolocation.getCurrentPosition(
+        (pos) => publish(pos.coords.latitude, pos.coords.longitude),
+        () => {}
+      );
+    };
+    send();
+    locationSendTimer = setInterval(send, 5000);
+  };
+
+  // Prefer the app's multiplexed socket; fall back to a dedicated per-session socket
+  if (window.mux) {
+    window.mux.join(sessionId, onLocation);
+    startSending((lat, lng) => window.mux.loc(sessionId, lat, lng));
+    return;
+  }
   const protocol = window.location.protocol === "https:" ? "wss:" : "ws:";
   const wsUrl = `${protocol}//${window.location.host}/ws/sessions/${sessionId}?token=${encodeURIComponent(token)}`;
-  ws = new WebSocket(wsUrl);
+  const sock = new WebSocket(wsUrl);
+  ws = sock;
   ws.onopen = () => {
-    if (navigator.geolocation) {
-      const send = () => {
-        navigator.geolocation.getCurrentPosition(
-          (pos) => {
-            if (ws && ws.readyState === WebSocket.OPEN) {
-              ws.send(JSON.stringify({ lat: pos.coords.latitude, lng: pos.coords.longitude }));
-            }
-          },
-          () => {}
-        );
-        send();
-      };
-      send();
-      setInterval(send, 5000);
-    }
+    startSending((lat, lng) => {
+      if (ws && ws.readyState === WebSocket.OPEN) ws.send(JSON.stringify({ lat, lng }));
+    });
+  };
+  ws.onclose = () => { if (ws === sock) stopLocationStream(); };
+  ws.onmessage = (event) => {
+    var msg;
+    try { msg = JSON.parse(event.data); } catch (e) { return; }
+    if (msg && msg.type === "location") onLocation(msg);
   };
-  ws.onclose = () => { stopLocationStream(); };
-
-  var firstFit = true;
-  locationPollTimer = setInterval(function () {
-    fetch("/api/sessions/" + sessionId + "/locations", {
-      headers: { Authorization: "Bearer " + getToken() },
-    })
-      .then(function (res) { return res.ok ? res.json() : null; })
-      .then(function (locs) {
-        if (!locs || !map) return;
-        var boundsUpdated = false;
-        ["a", "b"].forEach(function (side) {
-          var d = locs[side];
-          if (d && d.lat != null && d.lng != null) {
-            if (peerMarkers[side]) map.removeLayer(peerMarkers[side]);
-            var isMe = side === mySide;
-            peerMarkers[side] = L.marker([d.lat, d.lng])
-              .addTo(map)
-              .bindPopup(isMe ? "You" : "Peer");
-            boundsUpdated = true;
-          }
-        });
-        if (boundsUpdated && firstFit) {
-          firstFit = false;
-          setTimeout(function () {
-            if (window.fitMapToShowBothParties) fitMapToShowBothParties();
-          }, 100);
-        }
-      })
-      .catch(function () {});
-  }, 3000);
 }
 
 function getToken() {
@@ -412,13 +432,15 @@ function getToken() {
 }
 
 function stopLocationStream() {
+  if (wsSessionId != null && window.mux) window.mux.leave(wsSessionId);
   if (ws) {
     ws.close();
     ws = null;
   }
-  if (locationPollTimer) {
-    clearInterval(locationPollTimer);
-    locationPollTimer = null;
+  wsSessionId = null;
+  if (locationSendTimer) {
+    clearInterval(locationSendTimer);
+    locationSendTimer = null;
   }
   ["a", "b"].forEach((side) => {
     if (peerMarkers[side] && map) {